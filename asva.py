@@ -1,68 +1,415 @@
-# import importlib 
-import importlib
+import os
+import sys
+import numpy as np
+from pandas import read_excel, read_csv, core, factorize, DataFrame, concat, to_numeric, ExcelFile
+from pandas.api.types import union_categoricals, is_integer_dtype, is_float_dtype, is_numeric_dtype
+from numpy import array, around, percentile, argsort, bincount, cumsum, split
+from numpy.polynomial.polynomial import polyval
+from argparse import ArgumentParser
+from glob import glob
+from os import path, makedirs, cpu_count
+import subprocess
+from hashlib import sha256, blake2b
+from itertools import combinations
+from shutil import copyfile
+import pickle
+from copy import copy
+from tempfile import TemporaryDirectory
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context, get_all_start_methods
+from multiprocessing.util import Finalize
+from contextlib import contextmanager, nullcontext, redirect_stdout
+from io import StringIO
+from time import perf_counter
+from threading import Lock
+import json
+import tracemalloc
+try:
+    import resource
+except ImportError:
+    # the peak memory of the process is only available on Unix
+    resource = None
+# scipy, matplotlib and seaborn are imported on first use inside the functions that need them,
+# so that importing ASVA stays within STARTUP_BUDGET
 
-# A list of packages to be imported
-packages = ["PyQt5", "pandas", "numpy", "scipy", "seaborn", "matplotlib", "pingouin", "openpyxl"]
+# time budget in seconds for "import asva" in a fresh interpreter
+STARTUP_BUDGET = 1.0
 
-# Iterating over the list of packages
-for package in packages:
-    try:
-        # Attempting to import the package
-        importlib.import_module(package)
-    except ModuleNotFoundError:
-        # If import fails due to FileNotFoundError, then install the package
-        # using the subprocess library
-        import subprocess
-        subprocess.run(["pip", "install", package])
+# Polynomial coefficients of Royston's approximation to the Shapiro-Wilk test (Algorithm AS R94)
+_SW_C1 = [0.0, 0.221157, -0.147981, -2.07119, 4.434685, -2.706056]
+_SW_C2 = [0.0, 0.042981, -0.293762, -1.752461, 5.682633, -3.582633]
+_SW_C3 = [0.544, -0.39978, 0.025054, -6.714e-4]
+_SW_C4 = [1.3822, -0.77857, 0.062767, -0.0020322]
+_SW_C5 = [-1.5861, -0.31082, -0.083751, 0.0038915]
+_SW_C6 = [-0.4803, -0.082676, 0.0030302]
+_SW_G = [-2.273, 0.459]
 
-import os
-import sys
-from PyQt5.QtWidgets import QApplication, QFileDialog, QMainWindow, QPushButton, QVBoxLayout, QWidget, QListWidget, QLabel
-from PyQt5.QtGui import QPalette, QColor, QFont
-from PyQt5.QtCore import Qt
-from pandas import read_excel, core
-from numpy import array, around, percentile
-from scipy.stats import shapiro, levene
-from seaborn import boxplot, stripplot
-from matplotlib import pyplot as plt
-from pingouin import anova, welch_anova, kruskal, pairwise_tukey, pairwise_gameshowell, ttest, mwu, pairwise_tests
-from warnings import filterwarnings
-from os import path, chdir, makedirs, getcwd
-
-filterwarnings("ignore", module='pingouin',message='Not prepending group keys to the result index of transform-like apply')
+# function to compute the Shapiro-Wilk coefficients a_1..a_n/2 for a sample size n
+def _shapiro_coefficients(n):
+    from scipy.special import ndtri
+    if n == 3:
+        return array([np.sqrt(0.5)])
+    # expected values of the lower normal order statistics
+    m = ndtri((np.arange(1, n // 2 + 1) - 0.375) / (n + 0.25))
+    summ2 = 2 * (m ** 2).sum()
+    rsn = 1 / np.sqrt(n)
+    # the two outermost coefficients use Royston's polynomial corrections
+    a1 = polyval(rsn, _SW_C1) - m[0] / np.sqrt(summ2)
+    if n > 5:
+        a2 = polyval(rsn, _SW_C2) - m[1] / np.sqrt(summ2)
+        fac = np.sqrt((summ2 - 2 * m[0] ** 2 - 2 * m[1] ** 2) / (1 - 2 * a1 ** 2 - 2 * a2 ** 2))
+        a = -m / fac
+        a[1] = a2
+    else:
+        fac = np.sqrt((summ2 - 2 * m[0] ** 2) / (1 - 2 * a1 ** 2))
+        a = -m / fac
+    a[0] = a1
+    return a
+
+# function to run the Shapiro-Wilk test on every column of a 2-D block (rows = observations) at once
+def _shapiro_batch(block):
+    from scipy.stats import norm
+    n = block.shape[0]
+    if n < 3:
+        raise ValueError("Data must be at least length 3.")
+    y = np.sort(block, axis=0)
+    # subtract a central value for numerical stability, as scipy.stats.shapiro does
+    y = y - y[n // 2]
+    a = _shapiro_coefficients(n)
+    half = n // 2
+    numerator = (a[:, None] * (y[::-1][:half] - y[:half])).sum(axis=0)
+    sum_squares = ((y - y.mean(axis=0)) ** 2).sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # columns with zero range are perfectly "normal", as in scipy.stats.shapiro
+        w = np.where(sum_squares == 0, 1.0, np.minimum(numerator ** 2 / sum_squares, 1.0))
+        if n == 3:
+            p = np.maximum(6 / np.pi * (np.arcsin(np.sqrt(w)) - np.pi / 3), 0.0)
+        elif n <= 11:
+            w1 = np.log(1 - w)
+            gamma = polyval(n, _SW_G)
+            z = (-np.log(gamma - w1) - polyval(n, _SW_C3)) / np.exp(polyval(n, _SW_C4))
+            p = np.where(w1 >= gamma, 1e-99, norm.sf(z))
+        else:
+            w1 = np.log(1 - w)
+            z = (w1 - polyval(np.log(n), _SW_C5)) / np.exp(polyval(np.log(n), _SW_C6))
+            p = norm.sf(z)
+    p = np.where(sum_squares == 0, 1.0, p)
+    return w, p
+
+# function to run the Brown-Forsythe (median-centered Levene) test on every column of a list of group blocks at once
+def _levene_batch(groups):
+    from scipy.stats import f
+    k = len(groups)
+    n = array([len(group) for group in groups])
+    # absolute deviations from the group medians
+    deviations = [np.abs(group - np.median(group, axis=0)) for group in groups]
+    group_means = np.array([dev.mean(axis=0) for dev in deviations])
+    grand_mean = (n[:, None] * group_means).sum(axis=0) / n.sum()
+    between = (n[:, None] * (group_means - grand_mean) ** 2).sum(axis=0)
+    within = sum(((dev - mean) ** 2).sum(axis=0) for dev, mean in zip(deviations, group_means))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        statistic = (n.sum() - k) / (k - 1) * between / within
+    return statistic, f.sf(statistic, k - 1, n.sum() - k)
+
+# bracket modes of ASVA: brackets for all pairs of groups, or only for the pairs with a significant post-hoc test
+BRACKET_MODES = ("all", "significant")
+
+# gap in points kept between a bracket label and its neighbours in the same tier, half on each side
+_LABEL_MARGIN = 12
+
+# width and height in points of a "p=0.000" bracket label at fontsize 15, measured once per process with the
+# Agg renderer
+_label_points = None
+
+# function to get the rendered width and height in points of a bracket label
+def _bracket_label_points():
+    global _label_points
+    if _label_points is None:
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        figure = Figure()
+        canvas = FigureCanvasAgg(figure)
+        extent = figure.text(0, 0, "p=0.000", fontsize=15).get_window_extent(canvas.get_renderer())
+        _label_points = (extent.width * 72 / figure.dpi, extent.height * 72 / figure.dpi)
+    return _label_points
+
+# function to stack significance brackets into tiers: every bracket (i, j) goes into the lowest tier in which
+# neither its span nor its centred label of label_width plus margin (in group units) overlaps another bracket.
+# Brackets that meet at a group in one tier are drawn 0.1 short of it. Returns (i, j, left, right, tier),
+# shortest span first
+def _bracket_layout(pairs, label_width, margin=0.0):
+    tiers = []
+    placed = []
+    for i, j in sorted(pairs, key=lambda pair: (pair[1] - pair[0], pair[0])):
+        middle = (i + j) / 2
+        extent = (min(i, middle - (label_width + margin) / 2), max(j, middle + (label_width + margin) / 2))
+        for tier, occupied in enumerate(tiers):
+            if all(extent[1] <= start + 1e-9 or end <= extent[0] + 1e-9 for start, end in occupied):
+                break
+        else:
+            tier = len(tiers)
+            tiers.append([])
+        tiers[tier].append(extent)
+        placed.append((i, j, tier))
+    return [(i, j,
+             i + 0.1 if any(end == i and t == tier for _, end, t in placed) else i,
+             j - 0.1 if any(start == j and t == tier for start, _, t in placed) else j,
+             tier) for i, j, tier in placed]
+
+# function to apply the Sidak multiple comparison correction to an array of p-values
+def _sidak(pvals):
+    return np.clip(1 - (1 - pvals) ** np.count_nonzero(~np.isnan(pvals)), None, 1)
+
+# function to get the peak resident memory of this process in MB, or None where it is not available
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (2**20 if sys.platform == "darwin" else 2**10)
+
+# Define StageTimer class
+class StageTimer:
+    # constructor method; with trace_memory the Python allocations of every stage are traced as well
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.column = None
+        self.records = []
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    # method to get a context that records the wall time and memory of one stage of the current column
+    @contextmanager
+    def stage(self, stage):
+        rss = _peak_rss_mb()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            traced = tracemalloc.get_traced_memory()[0]
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            record = {"column": self.column, "stage": stage, "seconds": perf_counter() - start, "pid": os.getpid(),
+                      "peak_rss_mb": _peak_rss_mb(), "rss_growth_mb": None, "traced_peak_mb": None}
+            if rss is not None:
+                record["rss_growth_mb"] = record["peak_rss_mb"] - rss
+            if self.trace_memory:
+                record["traced_peak_mb"] = (tracemalloc.get_traced_memory()[1] - traced) / 2**20
+            self.records.append(record)
+
+    # method to record a stage that ran on another thread, e.g. the image writer, into the records of its column
+    def add(self, records, column, stage, seconds):
+        records.append({"column": column, "stage": stage, "seconds": seconds, "pid": os.getpid(),
+                        "peak_rss_mb": _peak_rss_mb(), "rss_growth_mb": None, "traced_peak_mb": None})
+
+# function to get a context that times a stage with a StageTimer, or does nothing without one
+def _timed(timer, stage):
+    return timer.stage(stage) if timer is not None else nullcontext()
+
+# test modes of ASVA.determine_test: the classic decision tree of assumption tests, or resampling
+TEST_MODES = ("classic", "resampling")
+
+# number of index elements (resamples x rows) of one resampling batch, which bounds its memory to about
+# 64 MB for the int64 indices and the gathered float64 values
+_RESAMPLE_BUDGET = 2**22
+
+# function to estimate a permutation p-value from batches of resamples: draw(size) returns the statistics of
+# size resamples, and the p-value counts those that reach the observed statistic. With early_stop the
+# resampling ends once the p-value is more than three standard errors above or below alpha
+def _resample_p(observed, draw, resamples, batch, alpha=0.05, early_stop=True):
+    hits = done = 0
+    while done < resamples:
+        size = min(batch, resamples - done)
+        # a relative tolerance, so that rounding does not hide resamples that equal the observed statistic
+        hits += np.count_nonzero(draw(size) >= observed * (1 - 1e-10))
+        done += size
+        p = (hits + 1) / (done + 1)
+        if early_stop and abs(p - alpha) > 3 * np.sqrt(p * (1 - p) / done):
+            break
+    return (hits + 1) / (done + 1)
+
+# number of columns screened per vectorized pass of screen_columns, which bounds its temporary memory
+_SCREEN_CHUNK = 256
+
+# function to get the smallest float type that holds every value of the given columns exactly
+def _block_dtype(dtypes):
+    # extension types (e.g. Int16) are judged by their NumPy type
+    dtypes = [getattr(dtype, "numpy_dtype", dtype) for dtype in dtypes]
+    return np.float32 if all(np.can_cast(dtype, np.float32, "safe") for dtype in dtypes) else np.float64
 
 # Define ASVA class
 class ASVA:
-    # constructor method
-    def __init__(self, data:core.frame.DataFrame, group_column:str):
-        # store input data and group column as class attributes
-        self.data = data
+    # constructor method; the numeric columns (or the given columns) are copied into one compact block,
+    # so that the object does not keep a reference to the DataFrame
+    # mode selects the test path of determine_test (see TEST_MODES); resamples, seed, batch and early_stop
+    # configure the resampling mode; brackets selects the pairs that get a significance bracket (see BRACKET_MODES)
+    def __init__(self, data:core.frame.DataFrame, group_column:str, columns=None, mode="classic", resamples=9999,
+                 seed=0, batch=1000, early_stop=True, brackets="all"):
+        if mode not in TEST_MODES:
+            raise ValueError(f"Unknown test mode {mode!r}, expected one of {list(TEST_MODES)}")
+        if brackets not in BRACKET_MODES:
+            raise ValueError(f"Unknown bracket mode {brackets!r}, expected one of {list(BRACKET_MODES)}")
+        # store the group column and the test configuration as class attributes
         self.group_column = group_column
-        # get the unique values of the group column and store as class attribute
-        self.group_values = sorted(data[group_column].unique())
+        self.mode = mode
+        self.resamples = resamples
+        self.seed = seed
+        self.batch = batch
+        self.early_stop = early_stop
+        self.brackets = brackets
+        # factorize the group column once: codes index into the sorted unique group values
+        codes, uniques = factorize(data[group_column], sort=True)
+        self.group_values = uniques.tolist()
+        # the smallest signed integer type that holds the codes and the missing code -1
+        self.group_codes = codes.astype(np.min_scalar_type(-max(len(uniques), 1)))
+        # stable sort of the row positions by group code, so that every group occupies one
+        # contiguous block; rows with a missing group (code -1) sort first and are dropped
+        missing = (codes < 0).sum()
+        order = argsort(codes, kind="stable")[missing:]
+        # size of every group and block boundaries of the groups inside the group-sorted rows
+        self.group_sizes = bincount(codes[codes >= 0], minlength=len(self.group_values))
+        self.group_bounds = cumsum(self.group_sizes)[:-1]
+        # the measurement columns in group order as one Fortran-ordered block, so that every column is
+        # contiguous and its groups are views; float32 is used when it holds all columns exactly
+        if columns is None:
+            columns = [col for col in data.columns if col != group_column and is_numeric_dtype(data[col].dtype)]
+        self.columns = list(columns)
+        self.column_index = {column: j for j, column in enumerate(self.columns)}
+        self.values = np.empty((len(order), len(self.columns)), order="F",
+                               dtype=_block_dtype([data[col].dtype for col in self.columns]))
+        for j, column in enumerate(self.columns):
+            # one column at a time, so that the temporary copies stay the size of a column
+            self.values[:, j] = data[column].to_numpy(dtype=self.values.dtype, na_value=np.nan)[order]
+        # index pairs (A, B) of all group comparisons, A before B in the order of group_values
+        self.pairs = array(list(combinations(range(len(self.group_values)), 2)), dtype=int).reshape(-1, 2).T
+        # cache of assumption test results keyed by (column, test, parameters)
+        self._results = {}
+        # structured record of the assumption tests and the chosen test path per column
+        self.records = {}
+        # optional StageTimer that records the time and memory of every stage
+        self.timer = None
+
+    # method to get the configuration that affects the results and plots; part of the cache key of every column
+    def test_config(self):
+        config = {}
+        if self.mode != "classic":
+            config.update(mode=self.mode, resamples=self.resamples, seed=self.seed, batch=self.batch,
+                          early_stop=self.early_stop)
+        if self.brackets != "all":
+            config["brackets"] = self.brackets
+        return config
+
+    # method to run a test only once per (column, test, parameters) key
+    def _cached(self, key, compute):
+        if key not in self._results:
+            self._results[key] = compute()
+        return self._results[key]
+
+    # method to get the record of a column, creating an empty one on first use
+    def assumption_record(self, column):
+        if column not in self.records:
+            self.records[column] = {"column": column, "shapiro_p": None, "distribution": None,
+                                    "levene_p": None, "variance": None, "test": None, "p": None}
+        return self.records[column]
+
+    # method to get the values of a column in group order, as a view of the block
+    def column_values(self, column):
+        if column not in self.column_index:
+            raise ValueError(f"Column {column!r} is not a numeric measurement column")
+        return self.values[:, self.column_index[column]]
+
+    # method to get the non-missing values of a column in group order, with the size and the boundaries of
+    # every group; a column without missing values is returned as a view of the block
+    def valid_values(self, column):
+        values = self.column_values(column)
+        missing = np.isnan(values)
+        if not missing.any():
+            return values, self.group_sizes, self.group_bounds
+        # missing values are dropped per group, as pingouin drops them
+        codes = np.repeat(np.arange(len(self.group_values)), self.group_sizes)
+        sizes = bincount(codes[~missing], minlength=len(self.group_values))
+        return values[~missing], sizes, cumsum(sizes)[:-1]
+
+    # method to get the non-missing data of a column split by group, as views of the block if nothing is missing
+    def group_data(self, column):
+        values, _, bounds = self.valid_values(column)
+        return split(values, bounds)
+
+    # method to get the values of a column in group order as float64 bytes, which do not depend on the dtype
+    # of the block (and so on the other columns); used to identify the data of a column between runs
+    def column_bytes(self, column):
+        return self.column_values(column).astype(np.float64, copy=False).tobytes()
+
+    # method to get a digest of the data of every group of a column, used to find changed groups between runs
+    def group_digests(self, column):
+        # the missing values are part of the digests, which identify the data as stored
+        groups = split(self.column_values(column), self.group_bounds)
+        return {group: blake2b(values.astype(np.float64, copy=False).tobytes(), digest_size=16).hexdigest()
+                for group, values in zip(self.group_values, groups)}
+
+    # method to screen many columns for normal distribution and equal variance in vectorized passes
+    def screen_columns(self, columns, alpha=0.05):
+        columns = list(columns)
+        norm_p_vals = np.empty((len(self.group_values), len(columns)))
+        variance_p = np.empty(len(columns))
+        # screen the columns in chunks, so that the float64 copy of the block stays small
+        for start in range(0, len(columns), _SCREEN_CHUNK):
+            chunk = [self.column_index[column] for column in columns[start:start + _SCREEN_CHUNK]]
+            block = self.values[:, chunk].astype(float)
+            groups = split(block, self.group_bounds)
+            # Shapiro-Wilk p-values for every group x column
+            norm_p_vals[:, start:start + len(chunk)] = [_shapiro_batch(group)[1] for group in groups]
+            # Levene's (Brown-Forsythe) p-value for every column
+            variance_p[start:start + len(chunk)] = _levene_batch(groups)[1]
+            # columns with missing values are screened one by one, on their non-missing values
+            for i in np.flatnonzero(np.isnan(block).any(axis=0)):
+                groups = [group[:, None].astype(float) for group in self.group_data(columns[start + i])]
+                norm_p_vals[:, start + i] = [_shapiro_batch(group)[1][0] for group in groups]
+                variance_p[start + i] = _levene_batch(groups)[1][0]
+        # compact decision table with one row per column, using the same rules as
+        # distribution_test and variance_test
+        table = DataFrame(norm_p_vals.T, index=columns, columns=[f"shapiro_p_{g}" for g in self.group_values])
+        table["distribution"] = np.where((norm_p_vals < alpha).any(axis=0), "nonparametric", "parametric")
+        table["levene_p"] = variance_p
+        table["variance"] = np.where(variance_p >= alpha, "equal_variance", "unequal_variance")
+        # seed the result cache, so distribution_test and variance_test reuse the screened p-values
+        for i, column in enumerate(columns):
+            self._results.setdefault((column, "shapiro", ()), norm_p_vals[:, i].tolist())
+            self._results.setdefault((column, "levene", ("median",)), variance_p[i])
+        return table
 
     # method to test for normal distribution
-    def distribution_test(self, column):
+    def distribution_test(self, column, alpha=0.05):
+        from scipy.stats import shapiro
         # store column as class attribute
         self.column = column
-        # perform Shapiro-Wilk test on data for each group
-        norm_p_vals = [shapiro(self.data[self.data[self.group_column] == i][self.column])[1] for i in self.group_values]
-        # set significance level
-        alpha = 0.05      
-        # return "nonparametric" if all p-values are less than alpha
-        return "nonparametric" if any(x < alpha for x in norm_p_vals) else "parametric"
+        # perform Shapiro-Wilk test on data for each group, once per column
+        with _timed(self.timer, "distribution_test"):
+            norm_p_vals = self._cached((self.column, "shapiro", ()),
+                                       lambda: [shapiro(group)[1] for group in self.group_data(self.column)])
+        # return "nonparametric" if any p-value is less than alpha
+        distribution = "nonparametric" if any(x < alpha for x in norm_p_vals) else "parametric"
+        # store the p-values and the decision in the record of the column
+        record = self.assumption_record(self.column)
+        record["shapiro_p"] = dict(zip(self.group_values, norm_p_vals))
+        record["distribution"] = distribution
+        return distribution
         
     # method to test for equal variance
-    def variance_test(self, column):
+    def variance_test(self, column, alpha=0.05):
+        from scipy.stats import levene
         # store column as class attribute
         self.column = column
-        # create list of tuples of data for each group
-        variance_list = [tuple(array(self.data[self.data[self.group_column] == g][self.column].tolist())) for g in self.group_values]
-        # perform Levene's test on data in variance_list
-        variance_p = levene(*variance_list)[1]
-        print(variance_p)
-        # return "equal_variance" if p-value is greater than or equal to 0.05
-        return "equal_variance" if variance_p >= 0.05 else "unequal_variance"
+        # perform Levene's test on the data of each group, once per column
+        with _timed(self.timer, "variance_test"):
+            variance_p = self._cached((self.column, "levene", ("median",)),
+                                      lambda: levene(*self.group_data(self.column), center="median")[1])
+        # return "equal_variance" if p-value is greater than or equal to alpha
+        variance = "equal_variance" if variance_p >= alpha else "unequal_variance"
+        # store the p-value and the decision in the record of the column
+        record = self.assumption_record(self.column)
+        record["levene_p"] = variance_p
+        record["variance"] = variance
+        return variance
     
     # method to determine which test to run
     def determine_test(self, column):
@@ -70,41 +417,257 @@ class ASVA:
         print("")
         # store column as class attribute
         self.column = column
-        if len(self.group_values) > 2:
+        if self.mode == "resampling" and len(self.group_values) >= 2:
+            # record the assumption tests, but resample whatever their outcome
+            self.distribution_test(column=self.column)
+            if len(self.group_values) > 2:
+                self.variance_test(column=self.column)
+            test = "permutation_bootstrap"
+            p, pc = self.permutation_bootstrap(column=self.column)
+            if len(self.group_values) == 2:
+                p = "not applicable"
+        elif len(self.group_values) > 2:
             # check if data in column is normally distributed
             if self.distribution_test(column=self.column) == "parametric":
                 #  check if variances are equal
-                if self.variance_test(column=self.column) =="equal_variance":
+                if self.variance_test(column=self.column) == "equal_variance":
                     # perform One-Way ANOVA with posthoc Tukey
+                    test = "anova_tukey"
                     p, pc = self.anova_tukey(column=self.column)
                 # if variances are not equal
-                elif self.variance_test(column=self.column) == "unequal_variance":
+                else:
                     # perform Welch's ANOVA with posthoc Tamhane T2
-                    p, pc = self.welchs_anova_tamhane(column=self.column)      
-            elif self.distribution_test(column=self.column) == "nonparametric":
+                    test = "welchs_anova_tamhane"
+                    p, pc = self.welchs_anova_tamhane(column=self.column)
+            else:
                 # perform Kruskal-Wallis-Test with Mann-Whitney-U-test
+                test = "kruskal_mannwhitneyu"
                 p, pc = self.kruskal_mannwhitneyu(column=self.column)
         elif len(self.group_values) == 2:
+            p = "not applicable"
             if self.distribution_test(column=self.column) == "parametric":
-                p = "not applicable"
+                test = "t_test"
                 pc = self.t_test(column=self.column)
-            elif self.distribution_test(column=self.column) == "nonparametric":
-                p = "not applicable"
+            else:
+                test = "mannwhinteyu"
                 pc = self.mannwhinteyu(column=self.column)
-        elif len(self.group_values) <= 2:
+        else:
             raise ValueError ("Two or fewer groups")
+        # store the chosen test path and the omnibus p-value in the record of the column
+        record = self.assumption_record(self.column)
+        record["test"] = test
+        record["p"] = p.item() if hasattr(p, "item") else None
         return p, pc
     
+    # method to get the size, mean and variance of every group of a column from the group-sorted column
+    def group_stats(self, column):
+        values, n, bounds = self.valid_values(column)
+        values = values.astype(float)
+        starts = np.concatenate([[0], bounds])
+        means = np.add.reduceat(values, starts) / n
+        variances = np.add.reduceat((values - np.repeat(means, n)) ** 2, starts) / (n - 1)
+        return n, means, variances
+
+    # method to build the compact post-hoc table of all group pairs from statistic and p-value arrays
+    def _posthoc_table(self, statistic, pval, **extra):
+        g1, g2 = self.pairs
+        labels = array(self.group_values, dtype=object)
+        return DataFrame({"A": labels[g1], "B": labels[g2], "stat": statistic, "pval": pval, **extra})
+
+    # method to run the one-way ANOVA from the group sums
+    def anova_p(self, column):
+        from scipy.stats import f
+        n, means, variances = self.group_stats(column)
+        k, total = len(n), n.sum()
+        grand_mean = (n * means).sum() / total
+        ms_between = (n * (means - grand_mean) ** 2).sum() / (k - 1)
+        ms_within = ((n - 1) * variances).sum() / (total - k)
+        return f.sf(ms_between / ms_within, k - 1, total - k)
+
+    # method to run Welch's ANOVA from the group sums
+    def welch_anova_p(self, column):
+        from scipy.stats import f
+        n, means, variances = self.group_stats(column)
+        k = len(n)
+        weights = n / variances
+        adjusted_mean = (weights * means).sum() / weights.sum()
+        ms_between = (weights * (means - adjusted_mean) ** 2).sum() / (k - 1)
+        lamb = 3 * ((1 / (n - 1)) * (1 - weights / weights.sum()) ** 2).sum() / (k ** 2 - 1)
+        return f.sf(ms_between / (1 + 2 * lamb * (k - 2) / 3), k - 1, 1 / lamb)
+
+    # method to run the Kruskal-Wallis test from one ranking of the whole column
+    def kruskal_p(self, column):
+        from scipy.stats import rankdata, chi2
+        values, n, bounds = self.valid_values(column)
+        values = values.astype(float)
+        ranks = rankdata(values)
+        rank_sums = np.add.reduceat(ranks, np.concatenate([[0], bounds]))
+        total = n.sum()
+        h = 12 / (total * (total + 1)) * (rank_sums ** 2 / n).sum() - 3 * (total + 1)
+        ties = np.unique(values, return_counts=True)[1]
+        h /= 1 - (ties ** 3 - ties).sum() / (total ** 3 - total)
+        return chi2.sf(h, len(n) - 1)
+
+    # method to run Tukey's HSD test on all pairs of groups
+    def pairwise_tukey(self, column):
+        from scipy.stats import studentized_range
+        n, means, variances = self.group_stats(column)
+        g1, g2 = self.pairs
+        dof = n.sum() - len(n)
+        ms_within = ((n - 1) * variances).sum() / dof
+        t = (means[g1] - means[g2]) / np.sqrt(ms_within / n[g1] + ms_within / n[g2])
+        pval = np.clip(studentized_range.sf(np.sqrt(2) * np.abs(t), len(n), dof), 0, 1)
+        return self._posthoc_table(t, pval)
+
+    # method to run the Games-Howell test on all pairs of groups
+    def pairwise_gameshowell(self, column):
+        from scipy.stats import studentized_range
+        n, means, variances = self.group_stats(column)
+        g1, g2 = self.pairs
+        se1, se2 = variances[g1] / n[g1], variances[g2] / n[g2]
+        t = (means[g1] - means[g2]) / np.sqrt(se1 + se2)
+        dof = (se1 + se2) ** 2 / (se1 ** 2 / (n[g1] - 1) + se2 ** 2 / (n[g2] - 1))
+        pval = np.clip(studentized_range.sf(np.sqrt(2) * np.abs(t), len(n), dof), 0, 1)
+        return self._posthoc_table(t, pval)
+
+    # method to run t-tests on all pairs of groups; Welch's t-test is used for unequal group sizes
+    def pairwise_ttest(self, column):
+        from scipy.stats import t as t_dist
+        n, means, variances = self.group_stats(column)
+        g1, g2 = self.pairs
+        n1, n2, v1, v2 = n[g1], n[g2], variances[g1], variances[g2]
+        pooled = ((n1 - 1) * v1 + (n2 - 1) * v2) / (n1 + n2 - 2)
+        welch = n1 != n2
+        se = np.where(welch, np.sqrt(v1 / n1 + v2 / n2), np.sqrt(pooled * (1 / n1 + 1 / n2)))
+        dof = np.where(welch, (v1 / n1 + v2 / n2) ** 2 / ((v1 / n1) ** 2 / (n1 - 1) + (v2 / n2) ** 2 / (n2 - 1)),
+                       n1 + n2 - 2)
+        t = (means[g1] - means[g2]) / se
+        return self._posthoc_table(t, np.clip(2 * t_dist.sf(np.abs(t), dof), 0, 1))
+
+    # method to run Mann-Whitney U tests on all pairs of groups, optionally with Sidak correction
+    def pairwise_mwu(self, column, padjust="none"):
+        from scipy.stats import norm, mannwhitneyu
+        sorted_groups = [np.sort(group.astype(float)) for group in self.group_data(column)]
+        statistic = np.empty(len(self.pairs[0]))
+        pval = np.empty(len(self.pairs[0]))
+        for i, (a, b) in enumerate(zip(*self.pairs)):
+            x, y = sorted_groups[a], sorted_groups[b]
+            n1, n2 = len(x), len(y)
+            # U of x counts the pairs with x above y, ties counting half
+            u1 = (np.searchsorted(y, x, "left") + np.searchsorted(y, x, "right")).sum() / 2
+            ties = np.unique(np.concatenate([x, y]), return_counts=True)[1]
+            statistic[i] = u1
+            if (n1 > 8 and n2 > 8) or (ties > 1).any():
+                # normal approximation with tie and continuity correction, as scipy.stats.mannwhitneyu
+                sigma = np.sqrt(n1 * n2 / 12 * ((n1 + n2 + 1) - (ties ** 3 - ties).sum() / ((n1 + n2) * (n1 + n2 - 1))))
+                pval[i] = 2 * norm.sf((max(u1, n1 * n2 - u1) - n1 * n2 / 2 - 0.5) / sigma)
+            else:
+                # small samples without ties use the exact distribution
+                pval[i] = mannwhitneyu(x, y, alternative="two-sided", method="exact").pvalue
+        pval = np.clip(pval, 0, 1)
+        if padjust == "sidak":
+            pval = _sidak(pval)
+        return self._posthoc_table(statistic, pval)
+
+    # method to get the number of resamples per batch for resamples of n rows, within _RESAMPLE_BUDGET
+    def _batch_size(self, n):
+        return max(1, min(self.batch, _RESAMPLE_BUDGET // max(n, 1)))
+
+    # method to run a permutation test of the between-group sum of squares, which orders the permutations like
+    # the F statistic; the permutations are drawn in batches of index arrays with a seeded generator
+    def permutation_p(self, column, alpha=0.05):
+        rng = np.random.default_rng(self.seed)
+        values, n, bounds = self.valid_values(column)
+        values = values.astype(float)
+        values = values - values.mean()
+        starts = np.concatenate([[0], bounds])
+        observed = (np.add.reduceat(values, starts) ** 2 / n).sum()
+
+        # between-group sum of squares of a batch of permutations, all in one pass
+        def draw(size):
+            permuted = values[rng.permuted(np.tile(np.arange(len(values)), (size, 1)), axis=1)]
+            return (np.add.reduceat(permuted, starts, axis=1) ** 2 / n).sum(axis=1)
+
+        return _resample_p(observed, draw, self.resamples, self._batch_size(len(values)), alpha, self.early_stop)
+
+    # method to run permutation tests of the mean difference of all pairs of groups, exact when all splits of
+    # a pair fit into the number of resamples, with bootstrap confidence intervals of the mean differences
+    def pairwise_permutation(self, column, padjust="sidak", alpha=0.05, confidence=0.95):
+        from math import comb
+        rng = np.random.default_rng(self.seed)
+        groups = [group.astype(float) for group in self.group_data(column)]
+        statistic = np.empty(len(self.pairs[0]))
+        pval = np.empty(len(self.pairs[0]))
+        # early stopping decides against the per-comparison alpha, so that the stopped p-values survive the
+        # Sidak correction applied below
+        if padjust == "sidak":
+            alpha = 1 - (1 - alpha) ** (1 / len(pval))
+        for i, (a, b) in enumerate(zip(*self.pairs)):
+            x, y = groups[a], groups[b]
+            pooled = np.concatenate([x, y])
+            total = pooled.sum()
+            statistic[i] = x.mean() - y.mean()
+            observed = abs(statistic[i])
+            if comb(len(pooled), len(x)) <= self.resamples:
+                # every split of the pooled values into the two groups, including the observed one
+                sums = pooled[array(list(combinations(range(len(pooled)), len(x))))].sum(axis=1)
+                diffs = np.abs(sums / len(x) - (total - sums) / len(y))
+                pval[i] = np.count_nonzero(diffs >= observed * (1 - 1e-10)) / len(diffs)
+                continue
+
+            # mean differences of a batch of permutations of the pooled values
+            def draw(size, pooled=pooled, total=total, n1=len(x), n2=len(y)):
+                sums = pooled[rng.permuted(np.tile(np.arange(n1 + n2), (size, 1)), axis=1)[:, :n1]].sum(axis=1)
+                return np.abs(sums / n1 - (total - sums) / n2)
+
+            pval[i] = _resample_p(observed, draw, self.resamples, self._batch_size(len(pooled)), alpha,
+                                  self.early_stop)
+        if padjust == "sidak":
+            pval = _sidak(pval)
+        # bootstrap means of every group, in batches, then the percentile intervals of the pair differences
+        means = np.empty((self.resamples, len(groups)))
+        for g, group in enumerate(groups):
+            batch = self._batch_size(len(group))
+            for start in range(0, self.resamples, batch):
+                size = min(batch, self.resamples - start)
+                means[start:start + size, g] = group[rng.integers(0, len(group), (size, len(group)))].mean(axis=1)
+        g1, g2 = self.pairs
+        ci_low, ci_high = np.percentile(means[:, g1] - means[:, g2], [50 * (1 - confidence), 50 * (1 + confidence)],
+                                        axis=0)
+        return self._posthoc_table(statistic, pval, ci_low=ci_low, ci_high=ci_high)
+
+    # method to run the permutation test and the pairwise permutation tests with bootstrap confidence intervals
+    def permutation_bootstrap(self, column):
+        # Perform a permutation test across all groups; with two groups the pairwise test is the only test
+        with _timed(self.timer, "omnibus"):
+            self.p = array([self.permutation_p(self.column)]) if len(self.group_values) > 2 else 0.01
+        # Perform pairwise permutation tests, with sidak correction for more than two groups
+        with _timed(self.timer, "posthoc"):
+            self.pc = self.pairwise_permutation(self.column,
+                                                padjust="sidak" if len(self.group_values) > 2 else "none")
+        # Create a text string containing some information about the results of the tests
+        self.text = [f"Resampling with up to {self.resamples} resamples (seed {self.seed}).\n"]
+        if len(self.group_values) > 2:
+            self.text.append("Permutation test:p={:.3f}\n".format(self.p.item()))
+            self.text.append("--> pairwise permutation tests with sidak multiple comparison correction "
+                             "and 95% bootstrap confidence intervals")
+        else:
+            self.text.append("--> permutation test with 95% bootstrap confidence interval")
+        self.text = "".join(self.text)
+        # Print the name of the column being analyzed and the text string
+        print(f"## {self.column} ##")
+        print(self.text)
+        # Return the 'p' and 'pc' attributes
+        return self.p, self.pc
+
     # method to run ANOVA and Tukey's post-hoc test
     def anova_tukey(self, column):
         # Perform a one-way ANOVA on the specified column
-        aov = anova(dv=self.column, between=self.group_column, data=self.data)
-        # Store the resulting p-value in the object's 'p' attribute
-        self.p = aov["p-unc"].values
+        with _timed(self.timer, "omnibus"):
+            self.p = array([self.anova_p(self.column)])
         # Perform a Tukey's post hoc test on the specified column
-        self.pc = pairwise_tukey(dv=self.column, between=self.group_column, data=self.data, effsize="none")
-        # Rename the resulting p-value column to 'pval'
-        self.pc.rename(columns={"p-tukey":"pval"}, inplace=True)
+        with _timed(self.timer, "posthoc"):
+            self.pc = self.pairwise_tukey(self.column)
         # Create a text string containing some information about the results of the tests
         self.text = ["The data is normal distributed with equal variances.\n",
                      "One-Way ANOVA:p={:.3f}\n".format(self.p.item()),
@@ -119,14 +682,14 @@ class ASVA:
     # method to run Welch's ANOVA and Tamhane's post-hoc test
     def welchs_anova_tamhane(self, column):
         # Perform a Welch's ANOVA on the specified column
-        aov = welch_anova(dv=self.column, between=self.group_column, data=self.data)
-        # Store the resulting p-value in the object's 'p' attribute
-        self.p = aov["p-unc"].values
+        with _timed(self.timer, "omnibus"):
+            self.p = array([self.welch_anova_p(self.column)])
         # Perform a Games-Howell post hoc test on the specified column
-        self.pc = pairwise_gameshowell(dv=self.column, between=self.group_column, data=self.data, effsize="none")
+        with _timed(self.timer, "posthoc"):
+            self.pc = self.pairwise_gameshowell(self.column)
         # Create a text string containing some information about the results of the tests
         self.text = ["The data is normal distributed with unequal variances.\n",
-                     "Welch's ANOVA:p={.3f}\n".format(round(float(self.p.item()), 3)),
+                     "Welch's ANOVA:p={:.3f}\n".format(self.p.item()),
                      "--> Games-Howell post hoc Test"]
         self.text = "".join(self.text)
         # Print the name of the column being analyzed and the text string
@@ -138,14 +701,11 @@ class ASVA:
     # method to run Kruskal-Wallis test and Mann-Whitney U post-hoc test
     def kruskal_mannwhitneyu(self, column):
         # Perform a Kruskal-Wallis test on the specified column
-        aov = kruskal(dv=self.column, between=self.group_column, data=self.data)
-        # Store the resulting p-value in the object's 'p' attribute
-        self.p = aov["p-unc"].values
+        with _timed(self.timer, "omnibus"):
+            self.p = array([self.kruskal_p(self.column)])
         # Perform Mann-Whitney U tests with a sidak multiple comparison correction
-        self.pc = pairwise_tests(data=self.data, dv=self.column, between=self.group_column, parametric=False,
-                                 alternative='two-sided', padjust="sidak")
-        # Rename the resulting p-value column to 'pval'
-        self.pc.rename(columns={"p-corr":"pval"}, inplace=True)
+        with _timed(self.timer, "posthoc"):
+            self.pc = self.pairwise_mwu(self.column, padjust="sidak")
         # Create a text string containing some information about the results of the tests
         self.text = ["The data is not normally distributed.\n",
                     "Kruskal-Wallis-Test:p={:.3f}\n".format(self.p.item()),
@@ -161,10 +721,8 @@ class ASVA:
         # Set the object's 'p' attribute to 0.01
         self.p = 0.01
         # Perform Mann-Whitney U tests without a multiple comparison correction
-        self.pc = pairwise_tests(data=self.data, dv=self.column, between=self.group_column, parametric=False,
-                            alternative='two-sided', padjust="none")
-        # Rename the resulting p-value column to 'pval'
-        self.pc.rename(columns={"p-unc":"pval"}, inplace=True)
+        with _timed(self.timer, "posthoc"):
+            self.pc = self.pairwise_mwu(self.column, padjust="none")
         # Create a text string containing some information about the test
         self.text = [f"The data is not normally distributed.\n"
                      f"--> Mann–Whitney U test"]
@@ -178,10 +736,8 @@ class ASVA:
     def t_test(self, column):
         self.p = 0.01
         # Perform t-tests without a multiple comparison correction
-        self.pc = pairwise_tests(data=self.data, dv=self.column, between=self.group_column, parametric=True,
-                             alternative='two-sided', padjust="none", correction="auto")
-        # Rename the resulting p-value column to 'pval'
-        self.pc.rename(columns={"p-unc":"pval"}, inplace=True)
+        with _timed(self.timer, "posthoc"):
+            self.pc = self.pairwise_ttest(self.column)
         # Create a text string containing some information about the test
         self.text = [f"The data is normally distributed.\n"
                      f"--> t-test"]
@@ -192,41 +748,53 @@ class ASVA:
         # Return the 'pc' attribute
         return self.pc
 
-    def plot_boxes(self):
-        # Initialize an empty list called boxes
-        self.boxes = []
-        # Check the length of group_values and assign values to boxes accordingly
+    # method to lay out the significance brackets of the last tested column: all pairs of groups, or only the
+    # pairs with a post-hoc p-value below alpha, stacked into tiers that do not overlap
+    def plot_boxes(self, alpha=0.05):
         if len(self.group_values) < 2:
-            # If group_values has fewer than 2 elements, raise a ValueError
             raise ValueError ("Too few groups")
-        elif len(self.group_values) == 2:
-            # If group_values has 2 elements, assign a single list with 4 elements to boxes
-            self.boxes = [[0,0,1,1]]
-        elif len(self.group_values) == 3:
-            # If group_values has 3 elements, assign 2 lists with 4 elements to boxes
-            self.boxes = [[0,0,2,2],
-                          [0,0,0.9,0.9], [1.1,1.1,2,2]]
-        elif len(self.group_values) == 4:
-            # If group_values has 4 elements, assign 2 lists with 4 elements and 2 lists with 5 elements to boxes
-            self.boxes = [[0,0,3,3],
-                          [0,0,1.9,1.9], [2.1,2.1,3,3],
-                          [0,0,0.9,0.9], [1.1,1.1,3,3],
-                          [1,1,2,2]]
-        else:
-            # If group_values has more than 4 elements, raise a ValueError
-            raise ValueError ("Too many groups")
-
-        # Return the value of boxes
+        pairs = list(zip(self.pairs[0].tolist(), self.pairs[1].tolist()))
+        if self.brackets == "significant":
+            # p-values by index pair, in the order of self.pairs
+            pairs = [pair for pair, pval in zip(pairs, self.pc["pval"]) if pval < alpha]
+        # each bracket as (i, j, left, right, tier), with the rendered width of a "p=0.000" label
+        self.boxes = self.bracket_layout(pairs)
         return self.boxes
-    def plot_figure(self, column):
-        # Set the size of the figure
-        plt.rcParams["figure.figsize"] = 2.5+0.5*len(self.group_values),8+len(self.group_values)*0.5
+
+    # method to lay out the brackets of pairs with the rendered width of a label of fontsize and the label margin
+    # (see _bracket_layout)
+    def bracket_layout(self, pairs, fontsize=15):
+        return _bracket_layout(pairs, self.group_units(_bracket_label_points()[0] * fontsize / 15),
+                               self.group_units(_LABEL_MARGIN))
+
+    # method to convert a width in points into group units of the axes of figure_size: the boxes are 0.8 wide and
+    # matplotlib pads the x-axis by 5% on each side
+    def group_units(self, points):
+        return points / 72 * (len(self.group_values) - 0.2) * 1.1 / (0.775 * self.figure_size()[0])
+
+    # method to get the figure size for the number of groups
+    def figure_size(self):
+        return 2.5+0.5*len(self.group_values), 8+len(self.group_values)*0.5
+
+    def plot_figure(self, column, ax=None):
+        from seaborn import boxplot, stripplot
+        from matplotlib.artist import setp
+        from matplotlib.collections import LineCollection
+        # store column as class attribute
+        self.column = column
+        # Create a new figure of the right size unless an axes to draw into is given
+        if ax is None:
+            from matplotlib import pyplot as plt
+            ax = plt.subplots(figsize=self.figure_size())[1]
+        # The group-sorted values of the column and the group of every value, read from the block
+        values = self.column_values(self.column)
+        groups = np.repeat(array(self.group_values, dtype=object), self.group_sizes)
         # Plot the boxplot
-        ax1 = boxplot(x=self.group_column, y=self.column, order=self.group_values, 
-                     data=self.data, color="grey", linewidth=2, fliersize=0)
+        ax1 = boxplot(x=groups, y=values, order=self.group_values, 
+                     color="grey", linewidth=2, fliersize=0, ax=ax)
         # Plot the stripplot
-        ax1 = stripplot(x=self.group_column, y=self.column, order=self.group_values, 
-                     data=self.data, color="white", linewidth=1.5, zorder=10, edgecolor="k", size=18)
+        ax1 = stripplot(x=groups, y=values, order=self.group_values, 
+                     color="white", linewidth=1.5, zorder=10, edgecolor="k", size=18, ax=ax)
         
         # Set the linewidth and fontsize
         linewidth = 2
@@ -237,8 +805,8 @@ class ASVA:
         title = " "
         
         # Set the y-axis limits
-        max_y = self.data[self.column].max()
-        min_y = self.data[self.column].min()
+        max_y = np.nanmax(values)
+        min_y = np.nanmin(values)
         if min_y > 0:
             ylim = [min_y-0.03*( max_y*1.5), max_y*(1 + 0.2*len(self.group_values))]
         elif min_y == 0:
@@ -246,245 +814,997 @@ class ASVA:
         elif min_y < 0:
             raise ValueError ("Values are too small")
 
+        # The brackets are only drawn if the omnibus test is significant
+        boxes = self.boxes if self.p < 0.05 else []
+        # The top tier sits at 90% of the y-axis range, lower tiers 8% below each other but above the data;
+        # the y-axis grows when the tiers do not fit
+        span = ylim[1] - ylim[0]
+        label_size = 15
+        if boxes:
+            tiers = max(box[4] for box in boxes) + 1
+            bottom = max(ylim[0] + (0.9 - 0.08*(tiers - 1))*span, max_y + 0.04*span)
+            top = max(ylim[1], bottom + (tiers - 1)*0.08*span + 0.1*span)
+            # height of a tier in points; the labels sit half a tier above their brackets, so labels taller than
+            # 0.45 tiers would reach the legs above and shrink to fit, and the narrower labels are laid out again
+            tier_points = 0.08*span / (top - ylim[0]) * ax1.get_position().height * ax1.figure.get_size_inches()[1] * 72
+            if _bracket_label_points()[1] > 0.45 * tier_points:
+                label_size = 15 * 0.45 * tier_points / _bracket_label_points()[1]
+                self.boxes = boxes = self.bracket_layout([(i, j) for i, j, _, _, _ in boxes], label_size)
+                tiers = max(box[4] for box in boxes) + 1
+                bottom = max(ylim[0] + (0.9 - 0.08*(tiers - 1))*span, max_y + 0.04*span)
+                top = max(ylim[1], bottom + (tiers - 1)*0.08*span + 0.1*span)
+            ylim[1] = top
+
         # Modify the plot aesthetics
         ax1.spines['right'].set_visible(False)
         ax1.spines['top'].set_visible(False)
-        plt.setp(ax1.spines.values(), linewidth=linewidth)
-        plt.xticks(fontsize=fontsize)
-        plt.yticks(fontsize=fontsize)
-        plt.xlabel(xlabel, fontsize=fontsize)
-        plt.ylabel(ylabel, fontsize=fontsize, labelpad=10)
+        setp(ax1.spines.values(), linewidth=linewidth)
+        ax1.set_xlabel(xlabel, fontsize=fontsize)
+        ax1.set_ylabel(ylabel, fontsize=fontsize, labelpad=10)
         ax1.tick_params(direction='out', length=4, width=linewidth, colors='k',
                      grid_color='k', grid_alpha=0.5)
-        plt.setp(ax1.artists, edgecolor = 'k')
-        plt.setp(ax1.lines, color='k')
+        setp(ax1.artists, edgecolor = 'k')
+        setp(ax1.lines, color='k')
         ax1.set_ylim(bottom=ylim[0], top=ylim[1])
         ax1.yaxis.set_tick_params(labelsize=fontsize)
         ax1.set_title(title, fontsize=fontsize, pad=15)
 
         # Set the x-tick labels
         labels = self.group_values
-        ax1.set_xticklabels(labels)
-        plt.xticks(fontsize=25,rotation=45,ha='right', rotation_mode="anchor")
-
-        #Create a list of rounded integers for each sublist in self.boxes
-        integer_box = [[int(round(num)) for num in sublst] for sublst in self.boxes]
-
-        #Loop through the list of integers and assign variables to the pvalues associated with each pair of corresponding A and B groups
-        for i, liste in enumerate(integer_box):
-            a = self.group_values[liste[0]]
-            b = self.group_values[liste[3]]
-            variable_name = "row" + str(i)
-            globals()[variable_name] = self.pc.loc[(self.pc["A"] == a) & (self.pc["B"] == b)].pval.values
-            
-        if self.p < 0.05:
-            #If two groups are present, draw a line on the graph and add the associated pvalue to the graph
-            if len(self.group_values) == 2:
-                ax1.plot(self.boxes[0], [0.9*(ylim[1]-ylim[0])+ylim[0],
-                                         0.924*(ylim[1]-ylim[0])+ylim[0],
-                                         0.924*(ylim[1]-ylim[0])+ylim[0],
-                                         0.9*(ylim[1]-ylim[0])+ylim[0]], linewidth= 2, color="k")
-                ax1.text(0.15, 0.94*(ylim[1]-ylim[0])+ylim[0],
-                         "p={:.3f}".format(row0.item()), fontsize=15)
-
-            #If three groups are present, draw two lines on the graph and add the associated pvalues to the graph
-            elif len(self.group_values) == 3:
-                ax1.plot(self.boxes[0], [0.900*(ylim[1]-ylim[0])+ylim[0],
-                                         0.924*(ylim[1]-ylim[0])+ylim[0],
-                                         0.924*(ylim[1]-ylim[0])+ylim[0],
-                                         0.900*(ylim[1]-ylim[0])+ylim[0]], linewidth= 2, color="k")
-                ax1.text(0.5, 0.94*(ylim[1]-ylim[0])+ylim[0],
-                         "p={:.3f}".format(row0.item()), fontsize=15)
-
-                ax1.plot(self.boxes[1], [0.82*(ylim[1]-ylim[0])+ylim[0],
-                                         0.844*(ylim[1]-ylim[0])+ylim[0],
-                                         0.844*(ylim[1]-ylim[0])+ylim[0],
-                                         0.82*(ylim[1]-ylim[0])+ylim[0]], linewidth= 2, color="k")
-                ax1.text(0, 0.86*(ylim[1]-ylim[0])+ylim[0],
-                         "p={:.3f}".format(row1.item()), fontsize=15)
-                ax1.plot(self.boxes[2], [0.82*(ylim[1]-ylim[0])+ylim[0],
-                                         0.844*(ylim[1]-ylim[0])+ylim[0],
-                                         0.844*(ylim[1]-ylim[0])+ylim[0],
-                                         0.82*(ylim[1]-ylim[0])+ylim[0]], linewidth= 2, color="k")
-                ax1.text(1.1, 0.86*(ylim[1]-ylim[0])+ylim[0],
-                         "p={:.3f}".format(row2.item()), fontsize=15)
-
-            #If four groups are present, draw four lines on the graph and add the associated pvalues to the graph
-            elif len(self.group_values) == 4:
-                ax1.plot(self.boxes[0], [0.900*(ylim[1]-ylim[0])+ylim[0],
-                                         0.924*(ylim[1]-ylim[0])+ylim[0],
-                                         0.924*(ylim[1]-ylim[0])+ylim[0],
-                                         0.900*(ylim[1]-ylim[0])+ylim[0]], linewidth= 2, color="k")
-                ax1.text(1, 0.94*(ylim[1]-ylim[0])+ylim[0],
-                         "p={:.3f}".format(row0.item()), fontsize=15)
-
-                ax1.plot(self.boxes[1], [0.820*(ylim[1]-ylim[0])+ylim[0],
-                                         0.844*(ylim[1]-ylim[0])+ylim[0],
-                                         0.844*(ylim[1]-ylim[0])+ylim[0],
-                                         0.820*(ylim[1]-ylim[0])+ylim[0]], linewidth= 2, color="k")
-                ax1.text(0.45, 0.86*(ylim[1]-ylim[0])+ylim[0],
-                         "p={:.3f}".format(row1.item()), fontsize=15)
-                ax1.plot(self.boxes[2], [0.820*(ylim[1]-ylim[0])+ylim[0],
-                                         0.844*(ylim[1]-ylim[0])+ylim[0],
-                                         0.844*(ylim[1]-ylim[0])+ylim[0],
-                                         0.820*(ylim[1]-ylim[0])+ylim[0]], linewidth= 2, color="k")
-                ax1.text(2.05, 0.86*(ylim[1]-ylim[0])+ylim[0],
-                         "p={:.3f}".format(row2.item()), fontsize=15)
-
-                ax1.plot(self.boxes[3], [0.740*(ylim[1]-ylim[0])+ylim[0],
-                                         0.764*(ylim[1]-ylim[0])+ylim[0],
-                                         0.764*(ylim[1]-ylim[0])+ylim[0],
-                                         0.740*(ylim[1]-ylim[0])+ylim[0]], linewidth= 2, color="k")
-                ax1.text(-0.05, 0.78*(ylim[1]-ylim[0])+ylim[0],
-                         "p={:.3f}".format(row3.item()), fontsize=15)
-                ax1.plot(self.boxes[4], [0.740*(ylim[1]-ylim[0])+ylim[0],
-                                         0.764*(ylim[1]-ylim[0])+ylim[0],
-                                         0.764*(ylim[1]-ylim[0])+ylim[0],
-                                         0.740*(ylim[1]-ylim[0])+ylim[0]], linewidth= 2, color="k")
-                ax1.text(1.55, 0.78*(ylim[1]-ylim[0])+ylim[0],
-                         "p={:.3f}".format(row4.item()), fontsize=15)
-
-                ax1.plot(self.boxes[5], [0.660*(ylim[1]-ylim[0])+ylim[0],
-                                         0.684*(ylim[1]-ylim[0])+ylim[0],
-                                         0.684*(ylim[1]-ylim[0])+ylim[0],
-                                         0.660*(ylim[1]-ylim[0])+ylim[0]], linewidth= 2, color="k")
-                ax1.text(1, 0.70*(ylim[1]-ylim[0])+ylim[0],
-                         "p={:.3f}".format(row5.item()), fontsize=15)
-
-        #Create two empty lists to store the 25th percentile and 75th percentile
-        twentyfive = []
-        seventyfive = []
-
-        #Loop through the different groups and create variables for each dataframe subset by group 
-        # and store the 25th percentile and 75th percentile values in the empty lists
-        for i, group in enumerate(self.group_values):
-            df_variable_name = f"df_{group}"
-            globals()[df_variable_name] = self.data[self.data[self.group_column]==group][self.column]
-            twentyfive_var_name = f"twentyfive_{group}"
-            twentyfive.append(twentyfive_var_name)
-            seventyfive_var_name = f"seventyfive_{group}"
-            seventyfive.append(seventyfive_var_name)
-            globals()[twentyfive_var_name] = percentile(globals()[df_variable_name], 25)
-            globals()[seventyfive_var_name] = percentile(globals()[df_variable_name], 75)
-
-        #Loop through the two lists to plot the 25th percentile and 75th percentile lines for each group
-        for i, (twfi, sefi) in enumerate(zip(twentyfive, seventyfive)):
-            ax1.plot([-0.4+1*i,-0.4+1*i,0.4+1*i, 0.4+1*i],
-                     [globals()[twfi],globals()[twfi],globals()[twfi],globals()[twfi]],
-                     color="k", linewidth=2, zorder=10)
-            ax1.plot([-0.4+1*i,-0.4+1*i,0.4+1*i, 0.4+1*i],
-                     [globals()[sefi],globals()[sefi],globals()[sefi],globals()[sefi]],
-                     color="k", linewidth=2, zorder=10)
-
-        #Save the plot and show it
-        # plt.savefig(f"Plots/{self.column}.jpg", format="jpg",bbox_inches="tight")
+        ax1.set_xticks(range(len(labels)))
+        ax1.set_xticklabels(labels, fontsize=fontsize, rotation=45, ha='right', rotation_mode="anchor")
+
+        # Look up the p-value of every pair of groups by (A, B)
+        pvals = dict(zip(zip(self.pc["A"], self.pc["B"]), self.pc["pval"]))
+
+        # Draw a bracket for each requested pair of groups at the height of its tier, all as one collection,
+        # and add the associated p-value above its middle
+        lines = []
+        for i, j, left, right, tier in boxes:
+            height = bottom + tier*0.08*span
+            lines.append([(left, height), (left, height + 0.024*span), (right, height + 0.024*span), (right, height)])
+            ax1.text((left + right) / 2, height + 0.04*span,
+                     "p={:.3f}".format(pvals[(self.group_values[i], self.group_values[j])]), fontsize=label_size, ha="center")
+        ax1.add_collection(LineCollection(lines, linewidths=2, colors="k"))
+
+        #Loop through the group slices of the column and collect the 25th percentile and 75th percentile lines for each group
+        percentile_lines = []
+        for i, group in enumerate(self.group_data(self.column)):
+            for value in percentile(group, [25, 75]):
+                percentile_lines.append([(-0.4+1*i, value), (0.4+1*i, value)])
+        ax1.add_collection(LineCollection(percentile_lines, linewidths=2, colors="k", zorder=10))
+
         return ax1
 
-class MainWindow(QMainWindow):
+# function to encode an RGB image array as JPEG file, run on the writer threads of FigureRenderer
+def _write_jpeg(image, dpi, file_name):
+    from PIL import Image
+    Image.fromarray(image).save(file_name, format="jpeg", dpi=(dpi, dpi))
+
+# Define FigureRenderer class
+class FigureRenderer:
+    # constructor method; one headless figure and axes is reused for every column
+    def __init__(self, figsize, writers=2, pad_inches=0.1, margin=3):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        width, height = figsize
+        # the axes keep the size they have in a default figure of figsize, but the canvas gets a
+        # margin on every side, so that labels are drawn inside it and the image can be cropped
+        self.figure = Figure(figsize=(width + 2*margin, height + 2*margin))
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_axes([(margin + 0.125*width) / (width + 2*margin),
+                                        (margin + 0.11*height) / (height + 2*margin),
+                                        0.775*width / (width + 2*margin),
+                                        0.77*height / (height + 2*margin)])
+        self.pad = int(round(pad_inches * self.figure.dpi))
+        # the JPEG encoding and file writing run on a pool of writer threads
+        self.writers = writers
+        self.executor = ThreadPoolExecutor(max_workers=writers)
+        self.pending = []
+        # optional StageTimer that records the time and memory of plotting and saving
+        self.timer = None
+
+    # method to plot a column of an ASVA object into the reused axes and queue the image for writing
+    def render(self, asva, column, file_name):
+        with _timed(self.timer, "plot"):
+            self.ax.cla()
+            asva.plot_figure(column=column, ax=self.ax)
+        with _timed(self.timer, "save"):
+            return self._save(file_name)
+
+    # method to draw the figure and queue the cropped image for writing
+    def _save(self, file_name):
+        # draw once and crop the image to the drawn content plus padding
+        self.canvas.draw()
+        image = np.asarray(self.canvas.buffer_rgba())[..., :3]
+        ink = (image != 255).any(axis=2)
+        rows = np.flatnonzero(ink.any(axis=1))
+        cols = np.flatnonzero(ink.any(axis=0))
+        if rows[0] == 0 or cols[0] == 0 or rows[-1] == ink.shape[0] - 1 or cols[-1] == ink.shape[1] - 1:
+            # the content does not fit into the margins; fall back to matplotlib's tight bounding box
+            self.figure.savefig(file_name, format="jpg", bbox_inches="tight")
+            return None
+        image = image[max(rows[0] - self.pad, 0):rows[-1] + 1 + self.pad,
+                      max(cols[0] - self.pad, 0):cols[-1] + 1 + self.pad].copy()
+        # keep the number of queued images bounded
+        while len(self.pending) >= 2 * self.writers:
+            self.pending.pop(0).result()
+        future = self.executor.submit(self._write, image, file_name, self.timer,
+                                      None if self.timer is None else self.timer.column,
+                                      None if self.timer is None else self.timer.records)
+        self.pending.append(future)
+        return future
+
+    # method to encode and write an image on a writer thread; the time is recorded as "encode" stage of the
+    # column, in the records the column had when it was saved
+    def _write(self, image, file_name, timer, column, records):
+        start = perf_counter()
+        _write_jpeg(image, self.figure.dpi, file_name)
+        if timer is not None:
+            timer.add(records, column, "encode", perf_counter() - start)
+
+    # method to wait until all queued images are written
+    def flush(self):
+        for future in self.pending:
+            future.result()
+        self.pending = []
+
+    # method to wait until all queued images are written and to stop the writer threads
+    def close(self):
+        self.flush()
+        self.executor.shutdown()
+
+# version of the analysis results; part of every cache key, so that changed results are never reused
+CACHE_VERSION = 6
+
+# function to get the default cache folder, following the XDG base directory convention
+def default_cache_dir():
+    return path.join(os.environ.get("XDG_CACHE_HOME", path.join(path.expanduser("~"), ".cache")), "asva")
+
+# versions of the libraries the results depend on, read once per process without importing them
+_library_versions = None
+
+def _get_library_versions():
+    global _library_versions
+    if _library_versions is None:
+        from importlib.metadata import version, PackageNotFoundError
+        versions = []
+        for package in ("numpy", "pandas", "scipy", "seaborn", "matplotlib"):
+            try:
+                versions.append((package, version(package)))
+            except PackageNotFoundError:
+                versions.append((package, None))
+        _library_versions = tuple(versions)
+    return _library_versions
+
+# Define ResultCache class
+class ResultCache:
+    # constructor method; results and images are stored as <key>.pkl and <key>.jpg in directory
+    def __init__(self, directory=None, max_bytes=512 * 2**20):
+        self.directory = directory if directory is not None else default_cache_dir()
+        self.max_bytes = max_bytes
+        # bytes written since the last eviction; the cache folder is scanned again once they exceed
+        # evict_bytes, so that a run does not scan the whole folder after every write
+        self.written = 0
+        self.evict_bytes = max_bytes // 16
+        makedirs(self.directory, exist_ok=True)
+        # apply a lowered size limit right away
+        self.evict()
+
+    # method to compute the content address of a column: a hash of the column data, the group column,
+    # the test configuration and the library versions
+    def key(self, asva, column, config=None):
+        digest = sha256()
+        digest.update(repr((CACHE_VERSION, _get_library_versions(), sorted((config or {}).items()),
+                            asva.group_column, asva.group_values, column)).encode())
+        # the group sizes and the group-sorted values identify the data of every group
+        digest.update(asva.group_sizes.tobytes())
+        digest.update(asva.column_bytes(column))
+        return digest.hexdigest()
+
+    # method to get the stored result and image file of a key, or None; a hit marks the entry as recently used
+    def get(self, key):
+        result_file = path.join(self.directory, f"{key}.pkl")
+        image_file = path.join(self.directory, f"{key}.jpg")
+        try:
+            with open(result_file, "rb") as file:
+                result = pickle.load(file)
+            # the modification time records the last use for the LRU eviction
+            os.utime(result_file)
+            os.utime(image_file)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        return result, image_file
+
+    # method to store the result of a key
+    def put(self, key, result):
+        self._write(path.join(self.directory, f"{key}.pkl"), pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+
+    # method to store the image of a key, copied from an image file
+    def put_image(self, key, image_file):
+        with open(image_file, "rb") as file:
+            self._write(path.join(self.directory, f"{key}.jpg"), file.read())
+        if self.written > self.evict_bytes:
+            self.evict()
+
+    # method to write a file atomically, so that concurrent workers never read partial entries
+    def _write(self, file_name, content):
+        temporary = f"{file_name}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(content)
+        os.replace(temporary, file_name)
+        self.written += len(content)
+
+    # method to remove the least recently used entries until the cache fits into max_bytes
+    def evict(self):
+        self.written = 0
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith((".pkl", ".jpg")):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, file_name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(file_name)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+# per-process state of the analysis workers, set by _init_worker or _init_pool_worker and _set_job
+_worker_asva = None
+_worker_renderer = None
+_worker_renderers = {}
+_worker_output_dir = None
+_worker_cache = None
+_worker_timer = None
+_worker_capture = False
+_worker_job = None
+
+# function to set up the state of an analysis worker; the ASVA object is shipped to each worker only once
+def _init_worker(asva, output_dir, cache=None, in_pool=True, trace_memory=False, profile_file=None):
+    _init_pool_worker(cache=cache, trace_memory=trace_memory, profile_file=profile_file, in_pool=in_pool)
+    _set_job(asva, output_dir)
+
+# function to set up the state of an analysis worker that runs the columns of several jobs
+def _init_pool_worker(cache=None, trace_memory=False, profile_file=None, in_pool=True):
+    global _worker_renderers, _worker_cache, _worker_timer, _worker_capture, _worker_job
+    _worker_renderers = {}
+    _worker_cache = cache
+    _worker_job = None
+    # one timer records the stages of the analysis and of the plot
+    _worker_timer = StageTimer(trace_memory=trace_memory)
+    # pool workers return their printed output with the result, so that the outputs of parallel
+    # columns are not interleaved
+    _worker_capture = in_pool
+    if in_pool:
+        # pool workers exit without returning to the caller, so flush the image writers on exit
+        Finalize(None, _close_renderers, exitpriority=10)
+        if profile_file is not None:
+            from cProfile import Profile
+            profiler = Profile()
+            profiler.enable()
+            # every worker writes its own profile when it exits
+            Finalize(None, _dump_profile, args=(profiler, profile_file.format(pid=os.getpid())), exitpriority=5)
+
+# function to make an ASVA object the one the worker analyses; the renderers are reused by figure size
+def _set_job(asva, output_dir):
+    global _worker_asva, _worker_renderer, _worker_output_dir
+    _worker_asva = asva
+    _worker_output_dir = output_dir
+    figsize = asva.figure_size()
+    if figsize not in _worker_renderers:
+        _worker_renderers[figsize] = FigureRenderer(figsize=figsize)
+    _worker_renderer = _worker_renderers[figsize]
+    _worker_asva.timer = _worker_timer
+    _worker_renderer.timer = _worker_timer
+
+# function to wait for the image writers of all renderers of the worker
+def _close_renderers():
+    for renderer in _worker_renderers.values():
+        renderer.close()
+
+# function to stop a profiler and write its statistics to a file
+def _dump_profile(profiler, file_name):
+    profiler.disable()
+    profiler.dump_stats(file_name)
+
+# function to run the test decision tree and the plot for one column inside a worker
+def _analyse_column(column):
+    _worker_timer.column = column
+    _worker_timer.records = []
+    log = StringIO()
+    with redirect_stdout(log) if _worker_capture else nullcontext():
+        result = _analyse(column)
+    if _worker_capture:
+        # pool workers return the result to another process, so its image is written first, to have the
+        # encode stage in its timings; in this process the writer threads add it to the timings later
+        _worker_renderer.flush()
+    # the stage timings and the output are not part of the cached result
+    result = dict(result, timings=_worker_timer.records)
+    if _worker_capture:
+        result["log"] = log.getvalue()
+    return result
+
+# function to analyse and plot one column, or to reuse its cached result and image
+def _analyse(column):
+    image_file = path.join(_worker_output_dir, f"{column}.jpg")
+    if _worker_cache is not None:
+        # reuse the stored result and image if the column has been analysed before
+        with _timed(_worker_timer, "cache"):
+            key = _worker_cache.key(_worker_asva, column, config=_worker_asva.test_config())
+            hit = _worker_cache.get(key)
+            if hit is not None:
+                result, cached_image = hit
+                copyfile(cached_image, image_file)
+        if hit is not None:
+            return dict(result, status="cached")
+    p, pc = _worker_asva.determine_test(column=column)
+    _worker_asva.plot_boxes()
+    future = _worker_renderer.render(_worker_asva, column, image_file)
+    result = {"column": column, "p": p, "pc": pc, "record": _worker_asva.assumption_record(column)}
+    if _worker_cache is not None:
+        _worker_cache.put(key, result)
+        # the image is stored once the writer thread has written it
+        if future is None:
+            _worker_cache.put_image(key, image_file)
+        else:
+            def store_image(done):
+                if done.exception() is None:
+                    _worker_cache.put_image(key, image_file)
+            future.add_done_callback(store_image)
+    return dict(result, status="computed")
+
+# function to analyse one column of a job of a WorkerPool, loading the job first if it is new to this worker
+def _analyse_job_column(task):
+    global _worker_job
+    job_file, output_dir, column = task
+    if job_file != _worker_job:
+        with open(job_file, "rb") as file:
+            asva = pickle.load(file)
+        # the block is memory-mapped, so that all workers share one copy in the page cache
+        asva.values = np.load(f"{path.splitext(job_file)[0]}.npy", mmap_mode="r")
+        _set_job(asva, output_dir)
+        _worker_job = job_file
+    return _analyse_column(column)
+
+# function to remove files that may already be gone; files that are still in use (memory-mapped files on
+# Windows) are left to the cleanup of their folder
+def _remove_files(*file_names):
+    for file_name in file_names:
+        try:
+            os.remove(file_name)
+        except OSError:
+            pass
+
+# Define WorkerPool class: one pool of worker processes shared by several runs of run_all, e.g. the jobs of
+# run_jobs or the runs of one window session; every run is written once to a scratch folder, from which the
+# workers load it
+class WorkerPool:
+    # constructor method; cache, trace_memory and profile_file apply to all runs of the pool
+    def __init__(self, workers=None, cache=None, trace_memory=False, profile_file=None):
+        self.workers = workers if workers is not None else cpu_count()
+        self.cache = cache
+        self.scratch = TemporaryDirectory(prefix="asva-")
+        self.jobs = 0
+        # the workers load every run from the scratch folder, so they do not need to be forked; forking is
+        # also unsafe from the window thread that starts them, so they are started by a fork server or spawned
+        context = get_context("forkserver" if "forkserver" in get_all_start_methods() else "spawn")
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                            initializer=_init_pool_worker,
+                                            initargs=(cache, trace_memory, profile_file))
+
+    # method to queue the columns of an ASVA object; returns the futures of the results in the order of columns
+    def submit(self, asva, output_dir, columns):
+        job_file = path.join(self.scratch.name, f"job_{self.jobs}.pkl")
+        block_file = f"{path.splitext(job_file)[0]}.npy"
+        self.jobs += 1
+        # the block is stored as .npy file for memory mapping, the rest of the object is pickled
+        np.save(block_file, asva.values)
+        job = copy(asva)
+        job.values = None
+        with open(job_file, "wb") as file:
+            pickle.dump(job, file, protocol=pickle.HIGHEST_PROTOCOL)
+        futures = [self.executor.submit(_analyse_job_column, (job_file, output_dir, column)) for column in columns]
+        # the scratch files of the job are removed once all of its columns are done or cancelled
+        remaining = [len(futures)]
+        lock = Lock()
+
+        # count a finished column of the job
+        def done(future):
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                _remove_files(job_file, block_file)
+
+        for future in futures:
+            future.add_done_callback(done)
+        if not futures:
+            _remove_files(job_file, block_file)
+        return futures
+
+    # method to stop the workers once the queued columns are done and to remove the scratch folder
+    def shutdown(self, cancel_futures=False):
+        self.executor.shutdown(wait=True, cancel_futures=cancel_futures)
+        self.scratch.cleanup()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown(cancel_futures=exc_info[0] is not None)
+
+# name of the file in the output folder that records the data and results of the last run
+MANIFEST_NAME = ".asva_manifest.pkl"
+
+# function to load the manifest of the last run in an output folder, or None
+def load_manifest(output_dir):
+    try:
+        with open(path.join(output_dir, MANIFEST_NAME), "rb") as file:
+            return pickle.load(file)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+
+# function to compare the columns of an ASVA object with a manifest; returns the changed columns, each with
+# the list of its new or changed groups (all groups for columns that were not part of the last run, and for
+# all columns when the group column or the test configuration changed)
+def diff_columns(manifest, asva, columns):
+    same_run = (manifest is not None and manifest["group_column"] == asva.group_column
+                and manifest.get("config", {}) == asva.test_config())
+    previous = manifest["columns"] if same_run else {}
+    changes = {}
+    for column in columns:
+        digests = asva.group_digests(column)
+        if column not in previous:
+            changes[column] = list(digests)
+            continue
+        old = previous[column]["groups"]
+        changed_groups = [group for group, digest in digests.items() if old.get(group) != digest]
+        # a group that disappeared changes the tests as well
+        changed_groups.extend(group for group in old if group not in digests)
+        if changed_groups:
+            changes[column] = changed_groups
+    return changes
+
+# function to get the base name of the run report and profiles, placed inside the output folder so that a later
+# batch run over the input folder does not pick the report up as input
+def report_base(output_dir):
+    return path.join(path.abspath(output_dir), "report")
+
+# function to write the run report of run_all: the stage timings of every column as CSV (one row per
+# column and stage) and as JSON, together with the totals per stage
+def write_report(results, output_dir, meta=None):
+    base = report_base(output_dir)
+    rows = []
+    columns = []
+    for result in results:
+        record = result.get("record") or {}
+        stages = [dict(timing, test=record.get("test"), status=result.get("status")) for timing in result["timings"]]
+        rows.extend(stages)
+        columns.append({"column": result["column"], "test": record.get("test"), "status": result.get("status"),
+                        "seconds": sum(stage["seconds"] for stage in stages), "stages": stages})
+    totals = {}
+    for row in rows:
+        totals[row["stage"]] = totals.get(row["stage"], 0.0) + row["seconds"]
+    DataFrame(rows, columns=["column", "stage", "seconds", "pid", "peak_rss_mb", "rss_growth_mb", "traced_peak_mb",
+                             "test", "status"]).to_csv(f"{base}.csv", index=False)
+    with open(f"{base}.json", "w") as file:
+        json.dump({"meta": meta or {}, "totals": totals, "columns": columns}, file, indent=1)
+    return f"{base}.json"
+
+# Define ResultSink class: collects the results of a run column-wise, with one row per analysed column and one
+# row per pairwise comparison, and writes them once as one table
+class ResultSink:
+    # fields of every row; the Shapiro-Wilk p-values get one more field per group, shapiro_p_<group>
+    FIELDS = ["row_type", "column", "test", "p", "distribution", "levene_p", "variance", "A", "B", "stat", "pval"]
+
+    # constructor method
     def __init__(self):
-        super().__init__()
+        self.table = {field: [] for field in self.FIELDS}
+        self.rows = 0
 
-        # Set up the user interface
-        self.initUI()
+    # method to append n rows given as lists per field; fields that are not given are left empty
+    def _extend(self, n, **values):
+        for field in values:
+            if field not in self.table:
+                # a field first seen now is empty in all earlier rows
+                self.table[field] = [None] * self.rows
+        for field, column in self.table.items():
+            column.extend(values[field] if field in values else [None] * n)
+        self.rows += n
 
-        # Initialize the dataframe and group column
-        self.df = None
-        self.group_column = None
-        
-    def closeEvent(self, event):
-        # Set the accept parameter to True to close the window
-        event.accept()
-
-    def initUI(self):
-        # Create a label to display the instruction "Choose the group column"
-        label = QLabel("Choose the group column:")
-
-        # Create a button that, when clicked, will open a file dialog
-        self.btn = QPushButton('Select Excel sheet', self)
-        self.btn.clicked.connect(self.showDialog)
-
-        # Create an "End" button to close the window
-        self.end_btn = QPushButton('End', self)
-        self.end_btn.clicked.connect(self.close)
-
-        # Create a list widget to display the columns of the imported data
-        self.column_list = QListWidget(self)
-        self.column_list.itemClicked.connect(self.setGroupColumn)
-
-        # Create a vertical layout to hold the widgets
-        layout = QVBoxLayout()
-        layout.addWidget(self.btn)  # Add the "Select Excel sheet" button below the label
-        layout.addWidget(label)  # Add the label
-        layout.addWidget(self.column_list)
-        layout.addWidget(self.end_btn)  # Add the "End" button to the bottom of the layout
-
-        # Create a central widget to hold the layout
-        central_widget = QWidget()
-        central_widget.setLayout(layout)
-        self.setCentralWidget(central_widget)
-
-        self.setGeometry(300, 300, 300, 200)
-        # self.setWindowTitle('Automated Statistical and Visual Analysis')
-        self.setWindowTitle('<html><head/><body><p><span style=" font-family:\'Arial\'; font-size:18pt; font-style:italic; font-weight:600;">Automated Statistical and Visual Analysis</span></p></body></html>')
-        self.show()
-
-    def showDialog(self):
-        # Open a file dialog to select an Excel sheet
-        options = QFileDialog.Options()
-        options |= QFileDialog.ReadOnly
-        file_name, _ = QFileDialog.getOpenFileName(self,"QFileDialog.getOpenFileName()", "","Excel Files (*.xlsx);;All Files (*)", options=options)
-        if file_name:
-            # If a file is selected, import it using pandas and display the columns in the list widget
-            self.df = read_excel(file_name, index_col="ID")
-            self.column_list.clear()
-            self.column_list.addItems(self.df.columns)
-            
-                # Set the directory of the Excel sheet as the current working directory
-        file_directory = path.dirname(file_name)
-        chdir(file_directory)
-        print(getcwd())
-        
-        # Create the "Plots" folder if it does not exist
-        if not path.exists("Plots"):
-            makedirs("Plots")
-            
-
-    def setGroupColumn(self, item):
-        # Set the group column to the selected item
-        self.group_column = item.text()
-        print(f'Selected column: {self.group_column}')
-        
-        # Print the values of the selected column if they have not been printed before
-        if not hasattr(self, 'values_printed'):
-            self.values_printed = True
-        
-        if self.df[self.group_column].dtypes == "O":
-            print(self.df)
-            # Define group_column variable
-            # Create list of columns, excluding group_column
-            columns = [col for col in self.df.columns.tolist() if col != self.group_column]
-            # Loop through columns
-            for col in columns:
-                # Create ASVA object for column
-                asva = ASVA(data=self.df, group_column=self.group_column)
-                # Determine which test to run
-                p, pc = asva.determine_test(column=col)
-                box = asva.plot_boxes()
-                ax1 = asva.plot_figure(column=col)
-                plt.savefig(f"Plots/{col}.jpg", format="jpg",bbox_inches="tight")
-                plt.show(block=False)
-                plt.close()
-                
+    # method to append the result of one column, as returned by run_all
+    def add(self, result):
+        column, record, pc = result["column"], result["record"], result["pc"]
+        shapiro = {f"shapiro_p_{group}": [p] for group, p in (record["shapiro_p"] or {}).items()}
+        self._extend(1, row_type=["column"], column=[column], test=[record["test"]], p=[record["p"]],
+                     distribution=[record["distribution"]], levene_p=[record["levene_p"]],
+                     variance=[record["variance"]], **shapiro)
+        n = len(pc)
+        # further fields of the post-hoc table, e.g. the confidence intervals of the resampling mode
+        extra = {field: pc[field].tolist() for field in pc.columns if field not in ("A", "B", "stat", "pval")}
+        self._extend(n, row_type=["pairwise"] * n, column=[column] * n, test=[record["test"]] * n,
+                     p=[record["p"]] * n, A=pc["A"].tolist(), B=pc["B"].tolist(), stat=pc["stat"].tolist(),
+                     pval=pc["pval"].tolist(), **extra)
+
+    # method to get the collected rows as DataFrame
+    def frame(self):
+        return DataFrame(self.table)
+
+    # method to write the collected rows to a Parquet, CSV or Excel file, chosen by the file extension
+    def flush(self, file_name):
+        extension = path.splitext(file_name)[1].lower()
+        frame = self.frame()
+        if extension == ".parquet":
+            frame.to_parquet(file_name, index=False)
+        elif extension == ".csv":
+            frame.to_csv(file_name, index=False)
+        elif extension == ".xlsx":
+            frame.to_excel(file_name, index=False)
+        else:
+            raise ValueError(f"Unsupported file type {extension!r}, expected one of ['.csv', '.parquet', '.xlsx']")
+        return file_name
+
+# function to get the name of the results table of a run, placed inside the output folder (see report_base)
+def results_file_name(output_dir, file_format="csv"):
+    return path.join(path.abspath(output_dir), f"results.{file_format}")
+
+# exception raised by run_all when its cancel event is set
+class AnalysisCancelled(Exception):
+    pass
+
+# function to analyse and plot all columns of a DataFrame on a pool of worker processes; with report the
+# stage timings are written as run report into the output folder, optionally with memory tracing and profiles.
+# progress is called with (done, total, result) after every finished column; setting the cancel event
+# (e.g. a threading.Event) stops the run after the running columns and raises AnalysisCancelled.
+# With results_file, the results of all columns are written as one table (see ResultSink). With a WorkerPool,
+# the columns run on its workers, with its cache, instead of on a pool of their own. test_config holds the
+# test mode, resampling and bracket settings of ASVA, e.g. {"mode": "resampling", "brackets": "significant"}.
+# With screen, all columns are first screened in one vectorized pass (see ASVA.screen_columns) and the table
+# is printed; the workers reuse the screened p-values instead of testing every column again
+def run_all(data, group_column, workers=1, output_dir="Plots", columns=None, cache=None, incremental=False,
+            report=True, trace_memory=False, profile=False, progress=None, cancel=None, results_file=None,
+            pool=None, test_config=None, screen=False):
+    return _start_run(data, group_column, workers=workers, output_dir=output_dir, columns=columns, cache=cache,
+                      incremental=incremental, report=report, trace_memory=trace_memory, profile=profile,
+                      progress=progress, cancel=cancel, results_file=results_file, pool=pool,
+                      test_config=test_config, screen=screen)()
+
+# function to start run_all: with a WorkerPool the columns are queued on its workers right away; returns a
+# function that collects the results, writes the report and the results table and returns the results
+def _start_run(data, group_column, workers=1, output_dir="Plots", columns=None, cache=None, incremental=False,
+               report=True, trace_memory=False, profile=False, progress=None, cancel=None, results_file=None,
+               pool=None, test_config=None, screen=False):
+    start = perf_counter()
+    # Create the output folder if it does not exist
+    makedirs(output_dir, exist_ok=True)
+    options = {"trace_memory": trace_memory, "profile_file": f"{report_base(output_dir)}_{{pid}}.prof" if profile else None,
+               "progress": progress, "cancel": cancel, "pool": pool}
+    # one compact copy of the columns, shared by the forked workers; by default ASVA takes every numeric column
+    # except the group column, so that text columns (e.g. notes) are left out
+    asva = ASVA(data=data, group_column=group_column, columns=columns, **(test_config or {}))
+    columns = asva.columns
+    if screen:
+        # the screened p-values are kept in the ASVA object that goes to the workers
+        print(asva.screen_columns(columns))
+    if not incremental:
+        collect = _start_columns(asva, columns, workers, output_dir, cache, **options)
+    else:
+        collect = _start_incremental(asva, columns, workers, output_dir, cache, options)
+
+    # collect the results and write the report and the results table
+    def finish():
+        results = collect()
+        if report:
+            write_report(results, output_dir, meta={"group_column": group_column, "columns": len(columns),
+                                                    "workers": workers, "incremental": incremental,
+                                                    "test_config": asva.test_config(),
+                                                    "seconds": perf_counter() - start,
+                                                    "libraries": dict(_get_library_versions())})
+        if results_file is not None:
+            sink = ResultSink()
+            for result in results:
+                sink.add(result)
+            sink.flush(results_file)
+        return results
+
+    return finish
+
+# function to re-run only the columns whose data changed since the last run, or whose image is missing;
+# returns a function that collects the results and records them in the manifest
+def _start_incremental(asva, columns, workers, output_dir, cache, options):
+    manifest = load_manifest(output_dir)
+    changes = diff_columns(manifest, asva, columns)
+    for column in columns:
+        if column not in changes and not path.exists(path.join(output_dir, f"{column}.jpg")):
+            changes[column] = []
+    print(f"## {len(changes)} of {len(columns)} columns changed ##")
+    for column, groups in changes.items():
+        print(f"{column}: {', '.join(map(str, groups)) if groups else 'image missing'}")
+    changed = [column for column in columns if column in changes]
+    collect = _start_columns(asva, changed, workers, output_dir, cache, **options)
+
+    # collect the changed columns and record the data and results of this run for the next one
+    def finish():
+        new_results = dict(zip(changed, collect()))
+        # reused results did not run any stage in this run
+        results = [new_results[column] if column in new_results
+                   else dict(manifest["columns"][column]["result"], status="reused", timings=[])
+                   for column in columns]
+        new_manifest = {"group_column": asva.group_column, "config": asva.test_config(),
+                        "columns": {column: {"groups": asva.group_digests(column), "result": result}
+                                    for column, result in zip(columns, results)}}
+        with open(path.join(output_dir, MANIFEST_NAME), "wb") as file:
+            pickle.dump(new_manifest, file, protocol=pickle.HIGHEST_PROTOCOL)
+        return results
+
+    return finish
+
+# function to start the columns: with a WorkerPool they are queued right away; returns a function that runs or
+# collects the columns, serially or on a pool of worker processes, and returns their results
+def _start_columns(asva, columns, workers, output_dir, cache, trace_memory=False, profile_file=None,
+                   progress=None, cancel=None, pool=None):
+    if not columns:
+        return lambda: []
+    if pool is not None:
+        workers = pool.workers
+    elif workers is None:
+        workers = cpu_count()
+    workers = min(workers, len(columns))
+    results = []
+
+    # collect a finished column and report it
+    def finish(result):
+        results.append(result)
+        if progress is not None:
+            progress(len(results), len(columns), result)
+
+    # collect the results of the workers in the order of columns; stop drops the columns not started yet
+    def collect(stream, stop):
+        try:
+            for result in stream:
+                # print the output of the workers in the order of the columns
+                print(result.pop("log"), end="")
+                finish(result)
+                if cancel is not None and cancel.is_set() and len(results) < len(columns):
+                    raise AnalysisCancelled()
+        except BaseException:
+            # a failed or cancelled run drops its columns that did not start yet
+            stop()
+            raise
+        return results
+
+    if pool is not None:
+        futures = pool.submit(asva, output_dir, columns)
+        return lambda: collect((future.result() for future in futures),
+                               lambda: [future.cancel() for future in futures])
+
+    # run the columns in this process or on a pool of their own
+    def run():
+        if workers <= 1:
+            # run in this process
+            _init_worker(asva, output_dir, cache=cache, in_pool=False, trace_memory=trace_memory)
+            profiler = None
+            if profile_file is not None:
+                from cProfile import Profile
+                profiler = Profile()
+            try:
+                for column in columns:
+                    if cancel is not None and cancel.is_set():
+                        raise AnalysisCancelled()
+                    finish(_analyse_column(column) if profiler is None else profiler.runcall(_analyse_column, column))
+            finally:
+                if profiler is not None:
+                    profiler.dump_stats(profile_file.format(pid=os.getpid()))
+                _close_renderers()
+                if trace_memory:
+                    # tracing slows down everything that runs afterwards in this process
+                    tracemalloc.stop()
+            return results
+        # forked workers inherit the block of the ASVA object instead of receiving a pickled copy
+        context = get_context("fork") if "fork" in get_all_start_methods() else None
+        # small chunks keep the progress steady and the cancellation quick
+        chunksize = max(1, len(columns) // (4 * workers)) if progress is None and cancel is None else 1
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(asva, output_dir, cache, True, trace_memory, profile_file)) as executor:
+            # map returns the results in the order of columns, whichever worker finishes first
+            return collect(executor.map(_analyse_column, columns, chunksize=chunksize),
+                           lambda: executor.shutdown(wait=True, cancel_futures=True))
+
+    return run
+
+# function to shrink the columns of a frame: integers to the smallest integer type, floats to float32
+# where that is lossless, and the group column to a categorical
+def _downcast(frame, group_column=None):
+    for column in frame.columns:
+        values = frame[column]
+        if column == group_column:
+            frame[column] = values.astype("category")
+        elif is_integer_dtype(values.dtype):
+            frame[column] = to_numeric(values, downcast="integer")
+        elif is_float_dtype(values.dtype) and values.dtype != np.float32:
+            narrow = values.astype(np.float32)
+            if ((narrow.astype(values.dtype) == values) | values.isna()).all():
+                frame[column] = narrow
+    return frame
+
+# function to concatenate downcast chunks, merging the categories of the group column; the merged categories
+# are sorted, as those of a single chunk, so that the group order does not depend on the chunk size
+def _concat_chunks(chunks, group_column=None):
+    if len(chunks) == 1:
+        return chunks[0]
+    frame = concat(chunks)
+    if group_column in frame.columns:
+        frame[group_column] = union_categoricals([chunk[group_column] for chunk in chunks], sort_categories=True)
+    return frame
+
+# function to select the columns to read: the index column, the group column and the requested columns
+def _projection(header, group_column=None, columns=None, index_col="ID"):
+    if columns is None:
+        return None
+    usecols = [index_col] if index_col in header else []
+    if group_column is not None:
+        usecols.append(group_column)
+    usecols.extend(col for col in columns if col not in usecols)
+    missing = [col for col in usecols if col not in header]
+    if missing:
+        raise ValueError(f"Columns not found: {missing}")
+    return usecols
+
+# function to read a CSV file in chunks
+def _read_csv(file_name, group_column=None, columns=None, index_col="ID", chunksize=100_000, **kwargs):
+    header = read_csv(file_name, nrows=0).columns.tolist()
+    usecols = _projection(header, group_column, columns, index_col)
+    chunks = [_downcast(chunk, group_column)
+              for chunk in read_csv(file_name, usecols=usecols, chunksize=chunksize, **kwargs)]
+    frame = _concat_chunks(chunks, group_column)
+    return frame.set_index(index_col) if index_col in frame.columns else frame
+
+# function to read a Parquet file in row batches
+def _read_parquet(file_name, group_column=None, columns=None, index_col="ID", chunksize=100_000, **kwargs):
+    from pyarrow.parquet import ParquetFile
+    parquet = ParquetFile(file_name)
+    usecols = _projection(parquet.schema_arrow.names, group_column, columns, index_col)
+    chunks = [_downcast(batch.to_pandas(), group_column)
+              for batch in parquet.iter_batches(batch_size=chunksize, columns=usecols)]
+    frame = _concat_chunks(chunks, group_column)
+    return frame.set_index(index_col) if index_col in frame.columns else frame
+
+# function to read a Feather file, memory-mapped
+def _read_feather(file_name, group_column=None, columns=None, index_col="ID", chunksize=None, **kwargs):
+    from pyarrow.feather import read_table as read_feather_table
+    from pyarrow.ipc import open_file
+    from pyarrow import memory_map
+    with memory_map(file_name) as source:
+        header = open_file(source).schema.names
+    usecols = _projection(header, group_column, columns, index_col)
+    frame = _downcast(read_feather_table(file_name, columns=usecols, memory_map=True).to_pandas(), group_column)
+    return frame.set_index(index_col) if index_col in frame.columns else frame
+
+# function to read an Excel sheet
+def _read_excel(file_name, group_column=None, columns=None, index_col="ID", chunksize=None, **kwargs):
+    header = read_excel(file_name, nrows=0, **kwargs).columns.tolist()
+    usecols = _projection(header, group_column, columns, index_col)
+    frame = _downcast(read_excel(file_name, usecols=usecols, **kwargs), group_column)
+    return frame.set_index(index_col) if index_col in frame.columns else frame
+
+# input readers by file extension; further formats can be added to this mapping
+READERS = {".xlsx": _read_excel, ".csv": _read_csv, ".parquet": _read_parquet, ".feather": _read_feather}
+
+# function to read an input file with the reader of its extension; only the index column, the group
+# column and the requested columns are read, numeric columns are downcast and the group column is categorical
+def read_table(file_name, group_column=None, columns=None, index_col="ID", chunksize=100_000, **kwargs):
+    extension = path.splitext(file_name)[1].lower()
+    if extension not in READERS:
+        raise ValueError(f"Unsupported file type {extension!r}, expected one of {sorted(READERS)}")
+    return READERS[extension](file_name, group_column=group_column, columns=columns, index_col=index_col,
+                              chunksize=chunksize, **kwargs)
+
+# extensions of the input files the batch runner picks up from directories
+INPUT_EXTENSIONS = tuple(READERS)
+
+# function to expand the input paths of the batch runner into a sorted list of workbooks
+def find_inputs(inputs):
+    files = []
+    for name in inputs:
+        if path.isdir(name):
+            files.extend(sorted(f for f in glob(path.join(name, "*")) if f.lower().endswith(INPUT_EXTENSIONS)))
+        else:
+            files.append(name)
+    return files
+
+# function to get the output folder of a (file, sheet, group column) job: relative output folders are placed
+# next to the input file, and with several jobs every job gets a subfolder named after its file and sheet;
+# the subfolder keeps the file extension (e.g. data_csv), so that data.csv and data.xlsx do not share one
+def job_output_dir(job, output_dir="Plots", several=False):
+    file_name, sheet = job[0], job[1]
+    directory = path.join(path.dirname(path.abspath(file_name)), output_dir)
+    if several:
+        stem, extension = path.splitext(path.basename(file_name))
+        directory = path.join(directory, f"{stem}_{extension.lstrip('.')}" if extension else stem)
+        if sheet is not None:
+            directory = path.join(directory, str(sheet))
+    return directory
+
+# function to run several analyses, given as (file, sheet, group column) jobs, through one shared pool of worker
+# processes and one cache; every job writes into its own output folder (see job_output_dir) and the list of
+# the results of every job is returned. The sheet is None for the first sheet or for files without sheets.
+# A job that fails is reported and gives None instead of its results; the other jobs still run
+def run_jobs(jobs, output_dir="Plots", workers=None, index_col="ID", columns=None, cache=None, incremental=False,
+             report=True, trace_memory=False, profile=False, results_format="csv", progress=None, cancel=None,
+             test_config=None):
+    jobs = [tuple(job) for job in jobs]
+    if workers is None:
+        workers = cpu_count()
+    output_dirs = [job_output_dir(job, output_dir, several=len(jobs) > 1) for job in jobs]
+    pool = None
+    if workers > 1 and jobs:
+        # the profiles of the shared workers are placed into the output folder of the first file
+        profile_file = None
+        if profile:
+            profile_file = f"{report_base(job_output_dir(jobs[0], output_dir))}_{{pid}}.prof"
+        pool = WorkerPool(workers, cache=cache, trace_memory=trace_memory, profile_file=profile_file)
+
+    # read a job and start its run; the output of the start is kept, to be printed before that of the columns
+    def start(job, job_dir):
+        file_name, sheet, group_column = job
+        sheet_kwargs = {} if sheet is None else {"sheet_name": sheet}
+        data = read_table(file_name, group_column=group_column, columns=columns, index_col=index_col,
+                          **sheet_kwargs)
+        if group_column not in data.columns:
+            raise ValueError(f"Group column {group_column!r} not found in {file_name}")
+        log = StringIO()
+        with redirect_stdout(log):
+            print(f"## {file_name}{'' if sheet is None else f' [{sheet}]'} -> {job_dir} ##")
+            finish = _start_run(data, group_column, workers=workers, output_dir=job_dir, columns=columns,
+                                cache=cache, incremental=incremental, report=report, trace_memory=trace_memory,
+                                profile=profile and pool is None, progress=progress, cancel=cancel,
+                                results_file=results_file_name(job_dir, results_format)
+                                if results_format is not None else None, pool=pool, test_config=test_config)
+        return log, finish
+
+    # get a function that raises the error of a job that could not be started, when the job is collected
+    def failed(error):
+        def finish():
+            raise error
+        return finish
+
+    # print the output of a started job and collect its results; a failed job is reported and gives None
+    def collect(job, log, finish):
+        print(log.getvalue(), end="")
+        try:
+            return finish()
+        except AnalysisCancelled:
+            raise
+        except Exception as error:
+            file_name, sheet = job[0], job[1]
+            name = f"{file_name}{'' if sheet is None else f' [{sheet}]'}"
+            print(f"## {name} failed: {type(error).__name__}: {error} ##", file=sys.stderr)
+            return None
+
+    results = []
+    started = []
+    try:
+        for job, job_dir in zip(jobs, output_dirs):
+            try:
+                started.append((job, *start(job, job_dir)))
+            except Exception as error:
+                # the error is reported when the job is collected, in the order of the jobs
+                started.append((job, StringIO(), failed(error)))
+            # with a shared pool the next job is read and queued before the current one is collected, so that
+            # the workers go on with its columns instead of waiting for the reading of the next file
+            while len(started) > (1 if pool is not None else 0):
+                results.append(collect(*started.pop(0)))
+        for started_job in started:
+            results.append(collect(*started_job))
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    return results
+
+# function to run the whole analysis on one or more workbooks without the window interface; sheets is None
+# for the first sheet of every workbook, a list of sheet names, or "all"; returns the results by (file, sheet)
+def run_batch(inputs, group_column, output_dir="Plots", workers=None, index_col="ID", columns=None, cache=None,
+              incremental=False, report=True, trace_memory=False, profile=False, results_format="csv", sheets=None,
+              test_config=None):
+    from matplotlib import pyplot as plt
+    # render into files only
+    plt.switch_backend("Agg")
+    jobs = []
+    for file_name in find_inputs(inputs):
+        if sheets is None or not file_name.lower().endswith(".xlsx"):
+            jobs.append((file_name, None, group_column))
+            continue
+        if sheets == "all":
+            with ExcelFile(file_name) as workbook:
+                names = workbook.sheet_names
+        else:
+            names = sheets
+        jobs.extend((file_name, sheet, group_column) for sheet in names)
+    results = run_jobs(jobs, output_dir=output_dir, workers=workers, index_col=index_col, columns=columns,
+                       cache=cache, incremental=incremental, report=report, trace_memory=trace_memory,
+                       profile=profile, results_format=results_format, test_config=test_config)
+    return {(file_name, sheet): result for (file_name, sheet, _), result in zip(jobs, results)}
+
+# function to measure the time of "import asva" in fresh interpreters, returning the fastest of several runs
+def measure_startup(repeat=3):
+    code = "import time; t = time.perf_counter(); import asva; print(time.perf_counter() - t)"
+    times = []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, "-c", code], cwd=path.dirname(path.abspath(__file__)),
+                                capture_output=True, text=True, check=True)
+        times.append(float(result.stdout))
+    return min(times)
+
+# function to parse the command line and start either the batch runner or the window interface
+def main(argv=None):
+    parser = ArgumentParser(description="Automated statistical and visual analysis of Excel sheets "
+                                        "and CSV, Parquet or Feather files. "
+                                        "Without input files the window interface is started.")
+    parser.add_argument("inputs", nargs="*", help="input files or directories containing input files")
+    parser.add_argument("-g", "--group-column", help="name of the group column")
+    parser.add_argument("-o", "--output-dir", default="Plots",
+                        help="output folder for the plots, relative to each workbook (default: Plots)")
+    parser.add_argument("-w", "--workers", type=int, default=cpu_count(),
+                        help="number of worker processes (default: number of cores)")
+    parser.add_argument("--index-col", default="ID", help="name of the index column (default: ID)")
+    parser.add_argument("-s", "--sheets", nargs="+",
+                        help="sheets of the Excel workbooks to analyse, or 'all' (default: the first sheet)")
+    parser.add_argument("-c", "--columns", nargs="+", help="measurement columns to analyse (default: all)")
+    parser.add_argument("--cache-dir", default=default_cache_dir(),
+                        help="folder of the result cache (default: %(default)s)")
+    parser.add_argument("--cache-size", type=int, default=512, help="size limit of the result cache in MB (default: 512)")
+    parser.add_argument("--no-cache", action="store_true", help="recompute every column instead of using the result cache")
+    parser.add_argument("--incremental", action="store_true",
+                        help="re-run only the columns whose data changed since the last run into the output folder")
+    parser.add_argument("--mode", default="classic", choices=TEST_MODES,
+                        help="classic assumption-based tests, or permutation tests with bootstrap confidence "
+                             "intervals (default: classic)")
+    parser.add_argument("--resamples", type=int, default=9999,
+                        help="number of permutations and bootstrap resamples of the resampling mode (default: 9999)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the resampling mode (default: 0)")
+    parser.add_argument("--brackets", default="all", choices=BRACKET_MODES,
+                        help="pairs of groups that get a significance bracket: all, or only the significant ones "
+                             "(default: all)")
+    parser.add_argument("--results-format", default="csv", choices=["csv", "parquet", "xlsx", "none"],
+                        help="format of the results table written next to the output folder (default: csv)")
+    parser.add_argument("--no-report", action="store_true",
+                        help="do not write the run report with the stage timings next to the output folder")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="trace the Python allocations of every stage in the run report (slower)")
+    parser.add_argument("--profile", action="store_true",
+                        help="write a cProfile file per worker process next to the output folder")
+    parser.add_argument("--startup-time", action="store_true",
+                        help=f"measure the import time of asva and fail if it exceeds {STARTUP_BUDGET}s")
+    args = parser.parse_args(argv)
+    if args.startup_time:
+        startup = measure_startup()
+        print(f"import asva: {startup:.3f}s (budget {STARTUP_BUDGET:.3f}s)")
+        return 0 if startup <= STARTUP_BUDGET else 1
+    if not args.inputs:
+        # only the window interface needs PyQt5
+        from asva_gui import main as gui_main
+        return gui_main()
+    if args.group_column is None:
+        parser.error("--group-column is required when input files are given")
+    cache = None if args.no_cache else ResultCache(args.cache_dir, max_bytes=args.cache_size * 2**20)
+    results = run_batch(args.inputs, args.group_column, output_dir=args.output_dir, workers=args.workers,
+              index_col=args.index_col, columns=args.columns, cache=cache, incremental=args.incremental,
+              report=not args.no_report, trace_memory=args.trace_memory, profile=args.profile,
+              results_format=None if args.results_format == "none" else args.results_format,
+              sheets="all" if args.sheets == ["all"] else args.sheets,
+              test_config={"mode": args.mode, "resamples": args.resamples, "seed": args.seed,
+                           "brackets": args.brackets})
+    # failed jobs have no results
+    return 0 if all(result is not None for result in results.values()) else 1
 
 
 if __name__ == '__main__':
     # This block is executed only if the script is run directly, rather than imported as a module.
-    # Create a QApplication with the command-line arguments passed in sys.argv.
-    app = QApplication(sys.argv) 
-    # Create an instance of the MainWindow class.
-    window = MainWindow() 
-    # Show the main window.
-    window.show() 
-    # Start the event loop and exit when it is finished.
-    # The return value is passed to sys.exit() and used as the script's exit status.
-    sys.exit(app.exec_()) 
+    sys.exit(main())
@@ -0,0 +1,216 @@
+import sys
+from threading import Event
+from PyQt5.QtWidgets import (QApplication, QFileDialog, QMainWindow, QPushButton, QVBoxLayout, QWidget, QListWidget,
+                             QLabel, QProgressBar)
+from PyQt5.QtGui import QPalette, QColor, QFont
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from os import path, makedirs, cpu_count
+from asva import run_all, read_table, ResultCache, WorkerPool, AnalysisCancelled, results_file_name
+
+# Define AnalysisJob class: runs the analysis of one group column on a background thread, so that the
+# window stays responsive; the columns themselves run on the worker processes of run_all
+class AnalysisJob(QThread):
+    # signals sent to the window: (done, total, result) after every column, with the result dict of run_all,
+    # the results at the end, or an error message; cancelled is sent when the job was stopped
+    progress = pyqtSignal(int, int, object)
+    results = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, data, group_column, output_dir, pool, parent=None):
+        super().__init__(parent)
+        self.data = data
+        self.group_column = group_column
+        self.output_dir = output_dir
+        self.pool = pool
+        # set by cancel(); run_all stops after the running columns
+        self.cancel_event = Event()
+
+    # method to stop the job as soon as possible
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        try:
+            # Screen all numeric columns for normal distribution and equal variance in one pass, then run
+            # the tests and plots of all of them on all cores
+            results = run_all(self.data, self.group_column, output_dir=self.output_dir,
+                              pool=self.pool, incremental=True, screen=True,
+                              results_file=results_file_name(self.output_dir, "xlsx"),
+                              progress=lambda done, total, result: self.progress.emit(done, total, result),
+                              cancel=self.cancel_event)
+        except AnalysisCancelled:
+            self.cancelled.emit()
+        except Exception as error:
+            self.failed.emit(str(error))
+        else:
+            self.results.emit(results)
+
+class MainWindow(QMainWindow):
+    def __init__(self):
+        super().__init__()
+
+        # Set up the user interface
+        self.initUI()
+
+        # Initialize the dataframe and group column
+        self.df = None
+        self.group_column = None
+        # The output folder next to the selected file
+        self.output_dir = None
+        # Results of unchanged columns are reused from the on-disk cache
+        self.cache = ResultCache()
+        # One pool of worker processes for the whole session, started with the first analysis
+        self.pool = None
+        # The running analysis job, and at most one job waiting for it to stop; a newer request replaces the
+        # waiting one, so that clicking several group columns never stacks up work
+        self.job = None
+        self.pending_job = None
+        
+    def closeEvent(self, event):
+        # Stop a running analysis before closing
+        self.pending_job = None
+        if self.job is not None:
+            self.job.cancel()
+            self.job.wait()
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+        # Set the accept parameter to True to close the window
+        event.accept()
+
+    def initUI(self):
+        # Create a label to display the instruction "Choose the group column"
+        label = QLabel("Choose the group column:")
+
+        # Create a button that, when clicked, will open a file dialog
+        self.btn = QPushButton('Select Excel sheet', self)
+        self.btn.clicked.connect(self.showDialog)
+
+        # Create an "End" button to close the window
+        self.end_btn = QPushButton('End', self)
+        self.end_btn.clicked.connect(self.close)
+
+        # Create a progress bar, a status label and a "Cancel" button for the running analysis
+        self.progress_bar = QProgressBar(self)
+        self.status_label = QLabel("", self)
+        self.cancel_btn = QPushButton('Cancel', self)
+        self.cancel_btn.setEnabled(False)
+        self.cancel_btn.clicked.connect(self.cancelAnalysis)
+
+        # Create a list widget to display the columns of the imported data
+        self.column_list = QListWidget(self)
+        self.column_list.itemClicked.connect(self.setGroupColumn)
+
+        # Create a vertical layout to hold the widgets
+        layout = QVBoxLayout()
+        layout.addWidget(self.btn)  # Add the "Select Excel sheet" button below the label
+        layout.addWidget(label)  # Add the label
+        layout.addWidget(self.column_list)
+        layout.addWidget(self.progress_bar)
+        layout.addWidget(self.status_label)
+        layout.addWidget(self.cancel_btn)
+        layout.addWidget(self.end_btn)  # Add the "End" button to the bottom of the layout
+
+        # Create a central widget to hold the layout
+        central_widget = QWidget()
+        central_widget.setLayout(layout)
+        self.setCentralWidget(central_widget)
+
+        self.setGeometry(300, 300, 300, 200)
+        # self.setWindowTitle('Automated Statistical and Visual Analysis')
+        self.setWindowTitle('<html><head/><body><p><span style=" font-family:\'Arial\'; font-size:18pt; font-style:italic; font-weight:600;">Automated Statistical and Visual Analysis</span></p></body></html>')
+        self.show()
+
+    def showDialog(self):
+        # Open a file dialog to select an Excel sheet or a CSV, Parquet or Feather file
+        options = QFileDialog.Options()
+        options |= QFileDialog.ReadOnly
+        file_name, _ = QFileDialog.getOpenFileName(self,"QFileDialog.getOpenFileName()", "","Data Files (*.xlsx *.csv *.parquet *.feather);;Excel Files (*.xlsx);;All Files (*)", options=options)
+        if file_name:
+            # If a file is selected, import it with the reader of its file type and display the columns in the list widget
+            self.df = read_table(file_name, index_col="ID")
+            self.column_list.clear()
+            self.column_list.addItems(self.df.columns)
+            # Write the plots into the "Plots" folder next to the file, without changing the working directory
+            self.output_dir = path.join(path.dirname(path.abspath(file_name)), "Plots")
+            print(self.output_dir)
+            makedirs(self.output_dir, exist_ok=True)
+            
+
+    def setGroupColumn(self, item):
+        # Set the group column to the selected item
+        self.group_column = item.text()
+        print(f'Selected column: {self.group_column}')
+        
+        # Print the values of the selected column if they have not been printed before
+        if not hasattr(self, 'values_printed'):
+            self.values_printed = True
+        
+        if self.df[self.group_column].dtypes.name in ("object", "category"):
+            # The job shares the sheet without copying it: ASVA factorizes the group column and copies the
+            # measurement columns into its own block, and a new file replaces self.df instead of changing it
+            print(self.df)
+            if self.pool is None:
+                self.pool = WorkerPool(cpu_count(), cache=self.cache)
+            job = AnalysisJob(self.df, self.group_column, self.output_dir, self.pool, parent=self)
+            job.progress.connect(self.showProgress)
+            job.results.connect(lambda results: self.status_label.setText(f"Done: {len(results)} columns"))
+            job.failed.connect(lambda message: self.status_label.setText(f"Failed: {message}"))
+            job.cancelled.connect(lambda: self.status_label.setText("Cancelled"))
+            job.finished.connect(self.jobFinished)
+            if self.job is None:
+                self.startJob(job)
+            else:
+                # Supersede the running job: stop it and replace any job that is already waiting
+                self.pending_job = job
+                self.job.cancel()
+                self.status_label.setText("Waiting for the running analysis to stop...")
+
+    def startJob(self, job):
+        # Start an analysis job on its background thread
+        self.job = job
+        self.progress_bar.setValue(0)
+        self.status_label.setText(f"Analysing {job.group_column}...")
+        self.cancel_btn.setEnabled(True)
+        job.start()
+
+    def showProgress(self, done, total, result):
+        # Show the progress of the running job with the test and the p-value of the finished column
+        self.progress_bar.setMaximum(total)
+        self.progress_bar.setValue(done)
+        record = result["record"] or {}
+        p = record.get("p")
+        self.status_label.setText(f"{done}/{total}: {result['column']} ({record.get('test')}"
+                                  f"{'' if p is None else f', p={p:.3g}'})")
+
+    def cancelAnalysis(self):
+        # Cancel the running job and drop the waiting one
+        self.pending_job = None
+        if self.job is not None:
+            self.job.cancel()
+            self.status_label.setText("Cancelling...")
+
+    def jobFinished(self):
+        # Start the waiting job, if any, once the running job has stopped
+        self.job = None
+        self.cancel_btn.setEnabled(False)
+        if self.pending_job is not None:
+            job, self.pending_job = self.pending_job, None
+            self.startJob(job)
+
+
+# function to start the window interface
+def main():
+    # Create a QApplication with the command-line arguments passed in sys.argv.
+    app = QApplication(sys.argv)
+    # Create an instance of the MainWindow class.
+    window = MainWindow()
+    # Show the main window.
+    window.show()
+    # Start the event loop and return its exit status.
+    return app.exec_()
+
+
+if __name__ == '__main__':
+    # This block is executed only if the script is run directly, rather than imported as a module.
+    sys.exit(main())
@@ -0,0 +1,164 @@
+import sys
+import json
+import platform
+import contextlib
+from io import StringIO
+from os import path, makedirs
+from time import perf_counter
+from tempfile import TemporaryDirectory
+from argparse import ArgumentParser
+import numpy as np
+from pandas import DataFrame
+from asva import ASVA, FigureRenderer, read_table, _get_library_versions
+
+# distributions of the synthetic measurements; all values are positive, as plot_figure requires
+DISTRIBUTIONS = {
+    "normal": lambda rng, size: rng.normal(loc=10, scale=1, size=size).clip(min=0),
+    "lognormal": lambda rng, size: rng.lognormal(mean=1, sigma=0.6, size=size),
+    "uniform": lambda rng, size: rng.uniform(0, 10, size=size),
+    "poisson": lambda rng, size: rng.poisson(lam=4, size=size).astype(float),
+}
+
+# post-hoc methods of ASVA by number of groups
+POSTHOC_METHODS = {2: ["t_test", "mannwhinteyu", "permutation_bootstrap"],
+                   "more": ["anova_tukey", "welchs_anova_tamhane", "kruskal_mannwhitneyu", "permutation_bootstrap"]}
+
+# function to generate a synthetic dataset with an ID index, a group column and measurement columns
+def make_dataset(rows, columns, groups, distribution="normal", variance="equal", seed=0):
+    rng = np.random.default_rng(seed)
+    labels = np.array([f"Group {chr(65 + i)}" for i in range(groups)])
+    group = labels[np.arange(rows) % groups]
+    values = DISTRIBUTIONS[distribution](rng, (rows, columns))
+    # shift the groups apart, and with unequal variances also scale them differently
+    codes = np.arange(rows) % groups
+    values = values + 0.5 * codes[:, None]
+    if variance == "unequal":
+        values = values * (1 + codes[:, None])
+    data = DataFrame(values, columns=[f"Measurement {i}" for i in range(columns)],
+                     index=[f"Sample_{i}" for i in range(rows)])
+    data.index.name = "ID"
+    data.insert(0, "Group", group)
+    return data
+
+# function to write a dataset in the format of the load stage
+def write_dataset(data, file_name):
+    if file_name.endswith(".csv"):
+        data.to_csv(file_name)
+    elif file_name.endswith(".parquet"):
+        data.reset_index().to_parquet(file_name, index=False)
+    elif file_name.endswith(".feather"):
+        data.reset_index().to_feather(file_name)
+    else:
+        data.to_excel(file_name)
+
+# function to time each stage of the ASVA pipeline on one dataset; returns the seconds per stage
+def time_stages(file_name, output_dir):
+    timings = {}
+
+    def timed(stage, function, *args, **kwargs):
+        start = perf_counter()
+        result = function(*args, **kwargs)
+        timings[stage] = timings.get(stage, 0.0) + perf_counter() - start
+        return result
+
+    data = timed("load", read_table, file_name, group_column="Group")
+    asva = ASVA(data=data, group_column="Group")
+    columns = [col for col in data.columns if col != "Group"]
+    methods = POSTHOC_METHODS[2] if len(asva.group_values) == 2 else POSTHOC_METHODS["more"]
+    renderer = FigureRenderer(figsize=asva.figure_size())
+    # the pipeline prints its results; keep the benchmark output clean
+    with contextlib.redirect_stdout(StringIO()):
+        timed("screen_columns", asva.screen_columns, columns)
+        # a fresh object, so that the assumption tests are not served from the screening cache
+        asva = ASVA(data=data, group_column="Group")
+        for column in columns:
+            asva.column = column
+            timed("distribution_test", asva.distribution_test, column)
+            if len(asva.group_values) > 2:
+                timed("variance_test", asva.variance_test, column)
+            for method in methods:
+                timed(method, getattr(asva, method), column)
+            asva.determine_test(column)
+            asva.plot_boxes()
+            timed("plot_figure", lambda: (renderer.ax.cla(), asva.plot_figure(column, ax=renderer.ax)))
+            timed("save", renderer.figure.savefig, path.join(output_dir, f"{column}.jpg"), format="jpg",
+                  bbox_inches="tight")
+            timed("render", renderer.render, asva, column, path.join(output_dir, f"{column}.render.jpg"))
+        timed("render", renderer.close)
+    return timings
+
+# function to run the benchmark over all combinations of the settings
+def run_benchmark(rows, columns, groups, distributions, variances, repeat=3, file_format="csv", seed=0):
+    results = []
+    with TemporaryDirectory() as directory:
+        # one untimed run, so that the lazy imports of the pipeline do not count towards the first setting
+        warmup = path.join(directory, "warmup.csv")
+        write_dataset(make_dataset(30, 2, 3, seed=seed), warmup)
+        makedirs(path.join(directory, "Plots"), exist_ok=True)
+        time_stages(warmup, path.join(directory, "Plots"))
+        for n_groups in groups:
+            for distribution in distributions:
+                for variance in variances:
+                    data = make_dataset(rows, columns, n_groups, distribution, variance, seed)
+                    file_name = path.join(directory, f"data.{file_format}")
+                    write_dataset(data, file_name)
+                    output_dir = path.join(directory, "Plots")
+                    makedirs(output_dir, exist_ok=True)
+                    # keep the fastest of the repeats for every stage
+                    best = {}
+                    for _ in range(repeat):
+                        for stage, seconds in time_stages(file_name, output_dir).items():
+                            best[stage] = min(seconds, best.get(stage, float("inf")))
+                    for stage, seconds in best.items():
+                        results.append({"rows": rows, "columns": columns, "groups": n_groups,
+                                        "distribution": distribution, "variance": variance, "format": file_format,
+                                        "stage": stage, "seconds": seconds, "seconds_per_column": seconds / columns})
+                        print(f"{n_groups} groups, {distribution}, {variance} variance: {stage:<22} {seconds:9.4f}s")
+    return results
+
+# function to compare two benchmark files; prints the ratio new/old for every matching stage
+def compare(old_file, new_file):
+    with open(old_file) as file:
+        old = json.load(file)
+    with open(new_file) as file:
+        new = json.load(file)
+    key = lambda result: (result["rows"], result["columns"], result["groups"], result["distribution"],
+                          result["variance"], result["format"], result["stage"])
+    old_results = {key(result): result["seconds"] for result in old["results"]}
+    for result in new["results"]:
+        if key(result) in old_results:
+            ratio = result["seconds"] / old_results[key(result)]
+            print(f"{result['groups']} groups, {result['distribution']}, {result['variance']} variance: "
+                  f"{result['stage']:<22} {old_results[key(result)]:9.4f}s -> {result['seconds']:9.4f}s ({ratio:5.2f}x)")
+
+# function to parse the command line and run the benchmark
+def main(argv=None):
+    parser = ArgumentParser(description="Benchmark the stages of the ASVA pipeline on synthetic datasets.")
+    parser.add_argument("--rows", type=int, default=200, help="number of rows (default: 200)")
+    parser.add_argument("--columns", type=int, default=20, help="number of measurement columns (default: 20)")
+    parser.add_argument("--groups", type=int, nargs="+", default=[2, 3, 4], help="group counts (default: 2 3 4)")
+    parser.add_argument("--distributions", nargs="+", default=["normal", "lognormal"], choices=sorted(DISTRIBUTIONS),
+                        help="distributions of the measurements (default: normal lognormal)")
+    parser.add_argument("--variances", nargs="+", default=["equal", "unequal"], choices=["equal", "unequal"],
+                        help="variance patterns across the groups (default: equal unequal)")
+    parser.add_argument("--format", default="csv", choices=["csv", "xlsx", "parquet", "feather"],
+                        help="file format of the load stage (default: csv)")
+    parser.add_argument("--repeat", type=int, default=3, help="repeats per setting, the fastest is kept (default: 3)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic data (default: 0)")
+    parser.add_argument("-o", "--output", default="benchmark.json", help="result file (default: benchmark.json)")
+    parser.add_argument("--compare", metavar="OLD", help="compare the results with an earlier result file")
+    args = parser.parse_args(argv)
+    results = run_benchmark(args.rows, args.columns, args.groups, args.distributions, args.variances,
+                            repeat=args.repeat, file_format=args.format, seed=args.seed)
+    meta = {"python": platform.python_version(), "platform": platform.platform(),
+            "libraries": dict(_get_library_versions())}
+    with open(args.output, "w") as file:
+        json.dump({"meta": meta, "results": results}, file, indent=1)
+    if args.compare:
+        compare(args.compare, args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    # This block is executed only if the script is run directly, rather than imported as a module.
+    sys.exit(main())
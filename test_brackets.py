@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+from asva import ASVA, _bracket_layout, _bracket_label_points, _LABEL_MARGIN
+
+pytest.importorskip("scipy.stats")
+
+# function to build a data set of normal groups whose means rise by step
+def make_data(k, step=0.5, size=20, seed=1):
+    rng = np.random.default_rng(seed)
+    groups = np.repeat([f"g{g:02d}" for g in range(k)], size)
+    values = rng.normal(10, 1, k * size) + np.repeat(np.arange(k) * step, size)
+    return pd.DataFrame({"group": groups, "value": values})
+
+@pytest.mark.parametrize("k", range(2, 13))
+def test_extents_do_not_overlap_within_a_tier(k):
+    asva = ASVA(make_data(k), "group")
+    label_width = asva.group_units(_bracket_label_points()[0])
+    margin = asva.group_units(_LABEL_MARGIN)
+    pairs = [(i, j) for i in range(k) for j in range(i + 1, k)]
+    boxes = _bracket_layout(pairs, label_width, margin)
+    assert sorted((i, j) for i, j, _, _, _ in boxes) == pairs
+    tiers = {}
+    for i, j, left, right, tier in boxes:
+        assert i <= left < right <= j
+        middle = (i + j) / 2
+        tiers.setdefault(tier, []).append((min(i, middle - (label_width + margin) / 2),
+                                           max(j, middle + (label_width + margin) / 2)))
+    # no tier is left empty
+    assert sorted(tiers) == list(range(len(tiers)))
+    for extents in tiers.values():
+        extents.sort()
+        for (_, end), (start, _) in zip(extents, extents[1:]):
+            assert end <= start + 1e-9
+
+def test_label_width_is_the_rendered_width():
+    asva = ASVA(make_data(12), "group")
+    # a "p=0.000" label at fontsize 15 is wider than the former estimate of 7 characters of 0.6 em
+    assert _bracket_label_points()[0] > 7 * 0.6 * 15
+    # two groups whose labels would touch at the estimated width get separate tiers
+    boxes = _bracket_layout([(0, 2), (2, 4)], asva.group_units(_bracket_label_points()[0]),
+                            asva.group_units(_LABEL_MARGIN))
+    assert [tier for _, _, _, _, tier in boxes] == [0, 1]
+
+@pytest.mark.parametrize("k", [4, 8])
+def test_significant_brackets_lay_out_the_significant_pairs(k):
+    # neighbouring groups are close and distant groups clearly different
+    asva = ASVA(make_data(k, step=0.4), "group", brackets="significant")
+    asva.determine_test("value")
+    boxes = asva.plot_boxes()
+    pairs = list(zip(asva.pairs[0].tolist(), asva.pairs[1].tolist()))
+    expected = sorted(pair for pair, pval in zip(pairs, asva.pc["pval"]) if pval < 0.05)
+    assert 0 < len(expected) < len(pairs)
+    assert sorted((i, j) for i, j, _, _, _ in boxes) == expected
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+import pytest
+from asva import ASVA, _shapiro_batch, _levene_batch
+
+scipy_stats = pytest.importorskip("scipy.stats")
+
+# function to build a data set of groups with unequal sizes, means and spreads, optionally with missing values
+def make_data(sizes=(12, 9, 15, 7), seed=1, ties=False, missing=0):
+    rng = np.random.default_rng(seed)
+    groups = []
+    values = []
+    for g, size in enumerate(sizes):
+        groups.extend([f"g{g}"] * size)
+        values.append(rng.normal(g * 0.4, 1 + 0.3 * g, size))
+    values = np.concatenate(values)
+    if ties:
+        values = np.round(values, 1)
+    if missing:
+        values[rng.choice(len(values), missing, replace=False)] = np.nan
+    return pd.DataFrame({"group": groups, "value": values})
+
+# function to get the non-missing values of every group in the order of the ASVA object
+def group_arrays(data, asva):
+    return [data.loc[data["group"] == group, "value"].dropna().to_numpy(dtype=float) for group in asva.group_values]
+
+@pytest.fixture(params=[(False, 0), (True, 0), (False, 4)], ids=["no_ties", "ties", "missing"])
+def data(request):
+    ties, missing = request.param
+    return make_data(ties=ties, missing=missing)
+
+def test_omnibus_matches_scipy(data):
+    asva = ASVA(data, "group")
+    groups = group_arrays(data, asva)
+    assert asva.anova_p("value") == pytest.approx(scipy_stats.f_oneway(*groups).pvalue, rel=1e-9)
+    assert asva.kruskal_p("value") == pytest.approx(scipy_stats.kruskal(*groups).pvalue, rel=1e-9)
+
+def test_welch_anova_matches_pingouin(data):
+    pingouin = pytest.importorskip("pingouin")
+    asva = ASVA(data, "group")
+    expected = pingouin.welch_anova(data=data, dv="value", between="group")["p-unc"].iloc[0]
+    assert asva.welch_anova_p("value") == pytest.approx(expected, rel=1e-9)
+
+def test_tukey_matches_pingouin(data):
+    pingouin = pytest.importorskip("pingouin")
+    pc = ASVA(data, "group").pairwise_tukey("value")
+    expected = pingouin.pairwise_tukey(data=data, dv="value", between="group")
+    assert pc["A"].tolist() == expected["A"].tolist() and pc["B"].tolist() == expected["B"].tolist()
+    np.testing.assert_allclose(pc["stat"], expected["T"], rtol=1e-9)
+    np.testing.assert_allclose(pc["pval"], expected["p-tukey"], rtol=1e-6, atol=1e-12)
+
+def test_gameshowell_matches_pingouin(data):
+    pingouin = pytest.importorskip("pingouin")
+    pc = ASVA(data, "group").pairwise_gameshowell("value")
+    expected = pingouin.pairwise_gameshowell(data=data, dv="value", between="group")
+    assert pc["A"].tolist() == expected["A"].tolist() and pc["B"].tolist() == expected["B"].tolist()
+    np.testing.assert_allclose(pc["stat"], expected["T"], rtol=1e-9)
+    np.testing.assert_allclose(pc["pval"], expected["pval"], rtol=1e-6, atol=1e-12)
+
+@pytest.mark.parametrize("sizes", [(12, 9, 15, 7), (10, 10, 10)], ids=["unequal", "equal"])
+@pytest.mark.parametrize("missing", [0, 3])
+def test_ttest_matches_scipy(sizes, missing):
+    data = make_data(sizes, missing=missing)
+    asva = ASVA(data, "group")
+    groups = group_arrays(data, asva)
+    pc = asva.pairwise_ttest("value")
+    for (a, b), stat, pval in zip(zip(*asva.pairs), pc["stat"], pc["pval"]):
+        # Welch's t-test for unequal group sizes, Student's t-test otherwise
+        expected = scipy_stats.ttest_ind(groups[a], groups[b], equal_var=len(groups[a]) == len(groups[b]))
+        assert stat == pytest.approx(expected.statistic, rel=1e-9)
+        assert pval == pytest.approx(expected.pvalue, rel=1e-9)
+
+@pytest.mark.parametrize("sizes", [(12, 9, 15, 7), (5, 6, 4)], ids=["asymptotic", "exact"])
+@pytest.mark.parametrize("missing", [0, 2])
+def test_mwu_matches_scipy(sizes, missing):
+    for ties in (False, True):
+        data = make_data(sizes, ties=ties, missing=missing)
+        asva = ASVA(data, "group")
+        groups = group_arrays(data, asva)
+        pc = asva.pairwise_mwu("value")
+        for (a, b), stat, pval in zip(zip(*asva.pairs), pc["stat"], pc["pval"]):
+            x, y = groups[a], groups[b]
+            has_ties = len(np.unique(np.concatenate([x, y]))) < len(x) + len(y)
+            method = "asymptotic" if (len(x) > 8 and len(y) > 8) or has_ties else "exact"
+            expected = scipy_stats.mannwhitneyu(x, y, alternative="two-sided", method=method)
+            assert stat == pytest.approx(expected.statistic)
+            assert pval == pytest.approx(expected.pvalue, rel=1e-9)
+
+@pytest.mark.parametrize("n", [3, 4, 7, 11, 12, 30, 200])
+def test_shapiro_batch_matches_scipy(n):
+    rng = np.random.default_rng(n)
+    block = np.column_stack([rng.normal(size=n), rng.exponential(size=n), rng.uniform(size=n),
+                             np.round(rng.normal(size=n), 1)])
+    w, p = _shapiro_batch(block)
+    for j in range(block.shape[1]):
+        expected = scipy_stats.shapiro(block[:, j])
+        assert w[j] == pytest.approx(expected.statistic, rel=1e-6)
+        assert p[j] == pytest.approx(expected.pvalue, rel=1e-5, abs=1e-12)
+
+def test_levene_batch_matches_scipy(data):
+    asva = ASVA(data, "group")
+    groups = group_arrays(data, asva)
+    statistic, p = _levene_batch([group[:, None] for group in groups])
+    expected = scipy_stats.levene(*groups, center="median")
+    assert statistic[0] == pytest.approx(expected.statistic, rel=1e-9)
+    assert p[0] == pytest.approx(expected.pvalue, rel=1e-9)
+
+def test_screen_columns_skips_missing_values():
+    data = make_data(missing=4)
+    data["complete"] = make_data(seed=2)["value"]
+    asva = ASVA(data, "group")
+    table = asva.screen_columns(["value", "complete"])
+    for column in ("value", "complete"):
+        groups = [data.loc[data["group"] == group, column].dropna().to_numpy(dtype=float)
+                  for group in asva.group_values]
+        expected = [scipy_stats.shapiro(group).pvalue for group in groups]
+        np.testing.assert_allclose(table.loc[column, [f"shapiro_p_{g}" for g in asva.group_values]].astype(float),
+                                   expected, rtol=1e-5)
+        assert table.loc[column, "levene_p"] == pytest.approx(scipy_stats.levene(*groups, center="median").pvalue)
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+from asva import ASVA
+
+scipy_stats = pytest.importorskip("scipy.stats")
+
+# function to build a data set of normal groups with the given sizes and means
+def make_data(sizes, means, seed=1):
+    rng = np.random.default_rng(seed)
+    groups = []
+    values = []
+    for g, (size, mean) in enumerate(zip(sizes, means)):
+        groups.extend([f"g{g:02d}"] * size)
+        values.append(rng.normal(mean, 1, size))
+    return pd.DataFrame({"group": groups, "value": np.concatenate(values)})
+
+# function to get the values of every group in the order of the ASVA object
+def group_arrays(data, asva):
+    return [data.loc[data["group"] == group, "value"].to_numpy(dtype=float) for group in asva.group_values]
+
+def test_exact_pairwise_matches_scipy():
+    data = make_data((5, 6, 4), (0, 1, 2))
+    asva = ASVA(data, "group", mode="resampling", resamples=9999)
+    groups = group_arrays(data, asva)
+    pc = asva.pairwise_permutation("value", padjust="none")
+    for (a, b), pval in zip(zip(*asva.pairs), pc["pval"]):
+        # all splits fit into the resamples, so both tests enumerate them
+        expected = scipy_stats.permutation_test((groups[a], groups[b]),
+                                                lambda x, y, axis: np.abs(x.mean(axis=axis) - y.mean(axis=axis)),
+                                                permutation_type="independent", alternative="greater",
+                                                n_resamples=np.inf, vectorized=True)
+        assert pval == pytest.approx(expected.pvalue, rel=1e-9)
+
+def test_fixed_seed_gives_the_same_results():
+    data = make_data((20, 25, 18), (0, 0.5, 0.8))
+    runs = []
+    for seed in (3, 3, 4):
+        asva = ASVA(data, "group", mode="resampling", resamples=2000, seed=seed)
+        runs.append((asva.permutation_p("value"), asva.pairwise_permutation("value")))
+    assert runs[0][0] == runs[1][0]
+    pd.testing.assert_frame_equal(runs[0][1], runs[1][1])
+    # another seed draws other resamples
+    assert not np.allclose(runs[0][1]["ci_low"], runs[2][1]["ci_low"])
+
+def test_omnibus_is_close_to_anova_on_normal_data():
+    data = make_data((30, 30, 30), (0, 0.3, 0.5), seed=5)
+    asva = ASVA(data, "group", mode="resampling", resamples=9999, early_stop=False)
+    expected = scipy_stats.f_oneway(*group_arrays(data, asva)).pvalue
+    assert 0.001 < expected < 0.5
+    assert asva.permutation_p("value") == pytest.approx(expected, abs=0.02)
+
+@pytest.mark.parametrize("early_stop", [True, False])
+def test_separated_pairs_stay_significant_after_sidak(early_stop):
+    # twelve groups, five standard deviations apart: every one of the 66 pairs is clearly different
+    data = make_data([10] * 12, np.arange(12) * 5.0)
+    asva = ASVA(data, "group", mode="resampling", resamples=9999, early_stop=early_stop)
+    pc = asva.pairwise_permutation("value", padjust="sidak")
+    assert len(pc) == 66
+    assert (pc["pval"] < 0.05).all()